@@ -9,6 +9,7 @@ added_files = [
     ('assets/bgmusic/*', 'assets/bgmusic'),
     ('assets/fonts/*', 'assets/fonts'),
     ('assets/icon/*', 'assets/icon'),
+    ('assets/book/*', 'assets/book'),
 ]
 
 a = Analysis(
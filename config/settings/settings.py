@@ -38,6 +38,22 @@ FONT_SIZES = {
 }
 
 FPS = 60
+# Transposition table size of the Pro AI, in MB
+AI_HASH_MB = 16
+# Run the Pro AI's search in its own worker process instead of a thread
+AI_USE_PROCESS = True
+# Processes searching each Pro AI move together over one shared table (Lazy SMP), 1 searches alone.
+# One core is left to the game's render loop, since pondering keeps the workers busy on both turns
+AI_WORKERS = max(1, min((os.cpu_count() or 1) - 1, 8))
+# Let the Pro AI search the expected reply while the human is thinking
+AI_PONDER = True
+# Selective search of the Pro AI: null-move pruning and late-move reductions
+AI_NULL_MOVE = True
+AI_LMR = True
+# Draw the statistics of the Pro AI's last search in the side panel (they are always logged)
+AI_SHOW_STATS = False
+# Opening book of the Pro AI, built by `python -m src.engine.book`
+AI_BOOK_PATH = resource_manager.get_resource_path(os.path.join('assets', 'book', 'book.bin'))
 OFFSET = 0
 
 BOARD_WIDTH = 800
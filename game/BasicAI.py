@@ -1,15 +1,19 @@
 import random
+import time
+from src.engine import EMPTY, QUEEN, PIECE_NAMES, MOVE_GENERATORS, move_promo
 
 class BasicAI:
     """
     Basic AI implementation for chess game.
     """
     
-    def __init__(self, side=1):
+    def __init__(self, side=1, move_generator='legal'):
         """
         Initialize AI with given side (1: black, 0: white)
+        and the move generator backend ('legal', 'bitboard' or 'mailbox')
         """
         self.side = side
+        self.move_generator = move_generator
         self._init_piece_values()
     
     def _init_piece_values(self):
@@ -25,72 +29,66 @@ class BasicAI:
             'Pawn': 10
         }
 
-    def evaluate_board(self, pieces):
+    def evaluate_board(self, position):
         """
         Calculate the total score of the current board state
         """
         score = 0
-        for piece in pieces:
-            value = self.piece_values[piece.__class__.__name__]
-            if piece.side == self.side:
+        for piece in position.squares:
+            if piece == EMPTY:
+                continue
+            value = self.piece_values[PIECE_NAMES[piece & 7]]
+            if piece >> 3 == self.side:
                 score += value
             else:
                 score -= value
         return score
 
-    def get_all_possible_moves(self, pieces, chessboard):
+    def generate_moves(self, position):
         """
-        Get all possible moves for the current side
+        Legal engine moves for the current side, promotions only to a queen;
+        the pseudo-legal backends' moves are checked one by one
         """
-        moves = []
-        for piece in pieces:
-            if piece.side == self.side and not piece.is_captured:
-                possible_moves = piece.get_possible_moves(chessboard)
-                for move in possible_moves:
-                    moves.append((piece, move))
-        return moves
+        pseudo_legal = self.move_generator != 'legal'
+        return [move for move in MOVE_GENERATORS[self.move_generator](position)
+                if move_promo(move) in (EMPTY, QUEEN) and (not pseudo_legal or position.is_legal(move))]
 
-    def make_move(self, pieces, chessboard):
+    def make_move(self, position, deadline=None, cancel=None):
         """
-        Select and return the best move based on board evaluation
+        Select and return the best engine move for a position snapshot.
+        Past the time.perf_counter() deadline or once cancel is set the best
+        move scored so far is returned
         """
-        possible_moves = self.get_all_possible_moves(pieces, chessboard)
+        possible_moves = self.generate_moves(position)
         if not possible_moves:
             return None
-            
-        return self._find_best_move(possible_moves, pieces, chessboard)
+        return self._find_best_move(possible_moves, position, deadline, cancel)
     
-    def _find_best_move(self, possible_moves, pieces, chessboard):
+    def _find_best_move(self, possible_moves, position, deadline=None, cancel=None):
         """
         Find the move with the highest evaluation score
         """
         best_move = None
         best_score = float('-inf')
         
-        for piece, move in possible_moves:
-            score = self._evaluate_move(piece, move, pieces, chessboard)
+        for move in possible_moves:
+            if best_move is not None:
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                if cancel is not None and cancel.is_set():
+                    break
+            score = self._evaluate_move(move, position)
             if score > best_score:
                 best_score = score
-                best_move = (piece, move)
+                best_move = move
                 
         return best_move
     
-    def _evaluate_move(self, piece, move, pieces, chessboard):
+    def _evaluate_move(self, move, position):
         """
-        Evaluate a single move by simulating it
+        Evaluate a single move by playing it on the position and taking it back
         """
-        old_x, old_y = piece.get_position()
-        old_piece_at_target = chessboard.map[move[1]][move[0]]
-
-        piece.move(move[0], move[1])
-        score = self.evaluate_board(pieces)
-
-        if old_piece_at_target is not None:
-            score += self.piece_values[old_piece_at_target.__class__.__name__]
-
-        piece.move(old_x, old_y)
-        if old_piece_at_target:
-            chessboard.map[move[1]][move[0]] = old_piece_at_target
-            old_piece_at_target.is_captured = False
-            
+        position.make_move(move)
+        score = self.evaluate_board(position)
+        position.unmake_move()
         return score
\ No newline at end of file
@@ -1,10 +1,56 @@
-import random
+import os
+import time
+
+import numpy as np
+
+from src.engine import (EMPTY, PAWN, KING, QUEEN, PIECE_NAMES, MOVE_GENERATORS, Search,
+                        TranspositionTable, SharedTranspositionTable, make_piece, move_promo,
+                        pack_score, taper)
+from src.engine.batch import BatchEvaluator
+from src.engine.bitboard import pop_count
+from src.engine.pawns import (PawnHashTable, FILE_MASKS, ADJACENT_FILES, PASSED_MASKS, SHIELD_MASKS,
+                              pawn_key)
+from src.engine.book import OpeningBook
+from src.engine.smp import LazySMP
+
+
+def helper_search(tt, **kwargs):
+    """Search of a Lazy SMP helper process, on the main process's shared table"""
+    return ProAI(tt=tt, **kwargs).searcher
+
 
 class ProAI:
-    def __init__(self, side=1):
+    def __init__(self, side=1, move_generator='legal', time_limit=0.9, hash_mb=16, workers=1, tt=None,
+                 book_path=None, null_move=True, lmr=True):
         self.side = side
+        self.move_generator = move_generator
+        # Seconds per move, kept under the game's 1 second ai_think_duration
+        self.time_limit = time_limit
+        # Kept between moves, so each search starts from what the last one learned
+        if tt is not None:
+            self.tt = tt
+        elif workers > 1:
+            self.tt = SharedTranspositionTable(hash_mb)
+        else:
+            self.tt = TranspositionTable(hash_mb)
         self._init_piece_values()
         self._init_position_tables()
+        self._init_psq_table()
+        self.batch = BatchEvaluator(self.psq_table, tapered=True)
+        # Pawn structure scores, computed once per pawn structure and king squares
+        self.pawn_cache = PawnHashTable()
+        self.searcher = Search(self.evaluate, self.tt, self.psq_table, null_move=null_move, lmr=lmr)
+        # workers - 1 helper processes searching every move with this one
+        self.smp = None
+        if workers > 1:
+            self.smp = LazySMP(workers - 1, self.tt, helper_search, side=side, move_generator=move_generator,
+                               null_move=null_move, lmr=lmr)
+        # (hash, move, seconds) of the last ponder search, used if the human plays the expected reply
+        self.pondered = None
+        # Search.stats() of the search behind the last move, None when it came from the book or pondering
+        self.search_stats = None
+        # Opening book, memory-mapped; the AI plays without one when the file is missing
+        self.book = OpeningBook(book_path) if book_path and os.path.exists(book_path) else None
 
     def _init_piece_values(self):
         self.piece_values = {
@@ -15,6 +61,14 @@ class ProAI:
             'Knight': 65,
             'Pawn': 20
         }
+        # Pawn structure, per pawn
+        self.pawn_weights = {
+            'doubled': -10,
+            'isolated': -12,
+            'shield': 8
+        }
+        # By ranks advanced from the pawn's starting rank
+        self.passed_pawn_bonus = [0, 5, 10, 20, 35, 60, 100, 0]
     
     def _init_position_tables(self):
         self.pawn_table = [
@@ -67,179 +121,277 @@ class ProAI:
             [-5,  0,  0,  0,  0,  0,  0, -5],
             [ 0,  0,  0,  5,  5,  0,  0,  0]
         ]
+        self.king_table = [
+            [-30,-40,-40,-50,-50,-40,-40,-30],
+            [-30,-40,-40,-50,-50,-40,-40,-30],
+            [-30,-40,-40,-50,-50,-40,-40,-30],
+            [-30,-40,-40,-50,-50,-40,-40,-30],
+            [-20,-30,-30,-40,-40,-30,-30,-20],
+            [-10,-20,-20,-20,-20,-20,-20,-10],
+            [ 20, 20,  0,  0,  0,  0, 20, 20],
+            [ 20, 30, 10,  0,  0, 10, 30, 20]
+        ]
+        # Endgame tables: the king walks to the centre and pawns are worth pushing
+        self.king_endgame_table = [
+            [-50,-40,-30,-20,-20,-30,-40,-50],
+            [-30,-20,-10,  0,  0,-10,-20,-30],
+            [-30,-10, 20, 30, 30, 20,-10,-30],
+            [-30,-10, 30, 40, 40, 30,-10,-30],
+            [-30,-10, 30, 40, 40, 30,-10,-30],
+            [-30,-10, 20, 30, 30, 20,-10,-30],
+            [-30,-30,  0,  0,  0,  0,-30,-30],
+            [-50,-30,-30,-30,-30,-30,-30,-50]
+        ]
+        self.pawn_endgame_table = [[value] * 8 for value in (0, 80, 50, 30, 15, 5, 0, 0)]
 
-    def make_move(self, pieces, chessboard):
-        possible_moves = self.get_all_possible_moves(pieces, chessboard)
+    def _init_psq_table(self):
+        """Sum every term that only depends on a piece and its square into one
+        table[piece][sq]; positions keep its total up to date as moves are played.
+        Entries are packed middlegame and endgame scores, blended by game phase."""
+        self.psq_table = [[0] * 64 for _ in range(15)]
+        for side in (0, 1):
+            for piece_type in range(PAWN, KING + 1):
+                piece = make_piece(side, piece_type)
+                for sq in range(64):
+                    self.psq_table[piece][sq] = pack_score(self.square_value(piece, sq),
+                                                           self.square_value_endgame(piece, sq))
+
+    def make_move(self, position, deadline=None, cancel=None):
+        """Search a position snapshot and return the best engine move.
+
+        Positions in the opening book are answered from the book. The search
+        ends after time_limit seconds, at the time.perf_counter() deadline if
+        that comes sooner, or as soon as the cancel event is set. After a ponder
+        hit the time already spent pondering counts towards time_limit."""
+        self.search_stats = None
+        possible_moves = self.generate_moves(position)
         if not possible_moves:
             return None
-        
-        moves_with_scores = []
-        king = next((p for p in pieces if p.__class__.__name__ == 'King' and p.side == self.side), None)
-        
-        is_in_check = king and king.is_in_check()
-        
-        for piece, move in possible_moves:
-            old_x, old_y = piece.get_position()
-            old_piece_at_target = chessboard.map[move[1]][move[0]]            
-
-            piece.move(move[0], move[1])
-            score = self.evaluate_board(pieces, chessboard)
-
-            if is_in_check:
-                if not king.is_in_check():
-                    score += 1000
-
-            if king.is_in_check():
-                score -= 2000
-
-            if old_piece_at_target:
-                capture_bonus = self.piece_values[old_piece_at_target.__class__.__name__] * 0.7
-                score += capture_bonus
-
-            piece.move(old_x, old_y)
-            if old_piece_at_target:
-                chessboard.map[move[1]][move[0]] = old_piece_at_target
-
-            if random.random() < 0.1:
-                score += random.randint(-5, 5)
-                
-            moves_with_scores.append((score, (piece, move)))
-
-        moves_with_scores.sort(key=lambda x: x[0], reverse=True)
-        
-        if is_in_check:
-            valid_moves = []
-            for score, move in moves_with_scores:
-                piece, (new_x, new_y) = move
-                old_x, old_y = piece.get_position()
-                old_piece_at_target = chessboard.map[new_y][new_x]
-                
-                piece.move(new_x, new_y)
-                if not king.is_in_check():
-                    valid_moves.append((score, move))
-                piece.move(old_x, old_y)
-                if old_piece_at_target:
-                    chessboard.map[new_y][new_x] = old_piece_at_target
-                
-            if valid_moves:
-                moves_with_scores = valid_moves
-        
-        top_moves = moves_with_scores[:7]
-        
-        if top_moves:
-            weights = [0.35, 0.25, 0.15, 0.1, 0.08, 0.05, 0.02]
-            return random.choices(top_moves, weights=weights[:len(top_moves)])[0][1]
-        return None
-
-    def get_all_possible_moves(self, pieces, chessboard):
-        """Get all possible moves for the AI's pieces"""
-        moves = []
-        for piece in pieces:
-            if piece.side == self.side and not piece.is_captured:
-                possible_moves = piece.get_possible_moves(chessboard)
-                for move in possible_moves:
-                    moves.append((piece, move))
-        return moves
-
-    def evaluate_board(self, pieces, chessboard):
-        score = 0
-        our_pieces = sum(1 for p in pieces if p.side == self.side and not p.is_captured)
-        enemy_pieces = sum(1 for p in pieces if p.side != self.side and not p.is_captured)
-        
-        for piece in pieces:
-            if piece.is_captured:
-                continue
+        if self.book is not None:
+            move = self.book.choose(position, possible_moves)
+            if move is not None:
+                self.pondered = None
+                return move
+        time_limit = self.time_limit
+        pondered, self.pondered = self.pondered, None
+        if pondered is not None and pondered[0] == position.hash and pondered[1] in possible_moves:
+            _, move, seconds = pondered
+            if seconds >= time_limit:
+                return move
+            time_limit -= seconds
+        move = self._search(position, time_limit=time_limit,
+                            root_moves=self.order_root_moves(position, possible_moves),
+                            deadline=deadline, cancel=cancel)
+        self.search_stats = self.searcher.stats()
+        # Fill and totals of the table, which lives with the search (e.g. in the worker process)
+        self.search_stats['tt'] = self.tt.stats()
+        if self.smp is not None:
+            self.search_stats['helper_nodes'] = self.smp.helper_nodes
+        return move
+
+    def ponder(self, position, cancel):
+        """Search the position after the expected human reply until cancel is set.
+
+        position is a snapshot after the AI's own move; returns the reply pondered on,
+        None if there is nothing to ponder."""
+        self.pondered = None
+        entry = self.tt.probe(position.hash)
+        legal_moves = position.legal_moves()
+        if entry is not None and entry[0] in legal_moves:
+            guess = entry[0]
+        else:
+            guess = self._search(position, max_depth=2, root_moves=legal_moves, cancel=cancel)
+        if guess is None or cancel.is_set():
+            return guess
+        position.make_move(guess)
+        possible_moves = self.generate_moves(position)
+        if possible_moves:
+            start = time.perf_counter()
+            move = self._search(position, root_moves=self.order_root_moves(position, possible_moves),
+                                cancel=cancel)
+            self.pondered = (position.hash, move, time.perf_counter() - start)
+        return guess
+
+    def order_root_moves(self, position, moves):
+        """The AI's moves by the piece-square score of the position they lead to,
+        all scored at once; the search keeps this order among its quiet moves"""
+        scores = self.batch.evaluate_moves(position, moves)
+        return [moves[index] for index in np.argsort(-scores, kind='stable')]
+
+    def _search(self, position, **kwargs):
+        if self.smp is not None:
+            return self.smp.search(self.searcher, position, **kwargs)
+        return self.searcher.search(position, **kwargs)
 
-            value = self.piece_values[piece.__class__.__name__]
-            multiplier = 1 if piece.side == self.side else -1
-            x, y = piece.get_position()
+    @property
+    def principal_variation(self):
+        """The line the last search expects, the AI's move first"""
+        return self.searcher.principal_variation
 
-            score += value * multiplier
+    def new_game(self):
+        """Forget the transposition table of the previous game"""
+        self.tt.clear()
+        self.pondered = None
 
-            position_value = self.evaluate_position(piece, x, y) * 0.8
-            score += position_value * multiplier
+    def close(self):
+        """Stop the Lazy SMP helpers, free the shared table and unmap the book"""
+        if self.book is not None:
+            self.book.close()
+            self.book = None
+        if self.smp is not None:
+            self.smp.close()
+            self.tt.close()
+            self.smp = None
 
-            protection_count = self.is_protected(piece, pieces, chessboard)
+    def evaluate(self, position):
+        """evaluate_board seen from the side to move, as the search expects"""
+        score = int(self.evaluate_board(position))
+        return score if position.side == self.side else -score
+
+    def generate_moves(self, position):
+        """Legal engine moves for the AI's side, promotions only to a queen; the
+        pseudo-legal backends' moves are checked one by one"""
+        pseudo_legal = self.move_generator != 'legal'
+        return [move for move in MOVE_GENERATORS[self.move_generator](position)
+                if move_promo(move) in (EMPTY, QUEEN) and (not pseudo_legal or position.is_legal(move))]
+
+    def evaluate_board(self, position):
+        squares = position.squares
+        if position.psq_table is self.psq_table:
+            score = position.psq
+        else:
+            score = sum(self.psq_table[piece][sq] for sq, piece in enumerate(squares) if piece != EMPTY)
+        score = taper(score, position.phase)
+        occupied = [sq for sq in range(64) if squares[sq] != EMPTY]
+
+        for sq in occupied:
+            piece = squares[sq]
+            side = piece >> 3
+            piece_type = PIECE_NAMES[piece & 7]
+            multiplier = 1 if side == self.side else -1
+
+            protection_count = self.is_protected(position, sq)
             protection_value = protection_count * 8
             score += protection_value * multiplier
 
-            attack_value = self.is_attacking(piece, pieces, chessboard)
+            attack_value = self.is_attacking(position, sq)
             score += attack_value * multiplier
 
-            center_control = self.control_center(piece, x, y)
-            score += center_control * multiplier
-
-            development = self.evaluate_development(piece, x, y)
-            score += development * multiplier
-
-            if piece.__class__.__name__ == 'King':
-                if piece.is_in_check():
-                    score += 150 if piece.side != self.side else -150
-                if piece.side == self.side and piece.first_move:
-                    score -= 30
-            elif piece.__class__.__name__ == 'Queen':
-                if (piece.side == 0 and y < 2) or (piece.side == 1 and y > 5):
-                    score -= 20 * multiplier
-            elif piece.__class__.__name__ == 'Pawn':
-                progress = 7 - y if piece.side == self.side else y
-                score += progress * 5 * multiplier
-                pawns_in_file = sum(1 for p in pieces 
-                                  if not p.is_captured and p.__class__.__name__ == 'Pawn' 
-                                  and p.get_position()[0] == x and p.side == piece.side)
-                if pawns_in_file > 1:
-                    score -= 10 * multiplier
-
-        total_pieces = our_pieces + enemy_pieces
-        if total_pieces < 10:
-            score *= 1.2
+            if piece_type == 'King':
+                if position.in_check(side):
+                    score += 150 if side != self.side else -150
 
+        score += self.evaluate_pawns(position)
+
+        return score
+
+    def evaluate_pawns(self, position):
+        """Pawn structure score, looked up in the pawn cache first"""
+        key = pawn_key(position)
+        score = self.pawn_cache.probe(key)
+        if score is None:
+            score = self.evaluate_pawn_structure(position)
+            self.pawn_cache.store(key, score)
         return score
 
-    def evaluate_position(self, piece, x, y):
+    def evaluate_pawn_structure(self, position):
+        """Doubled, isolated and passed pawns and the pawn shield in front of each king"""
+        score = 0
+        bitboards = position.bitboards
+        weights = self.pawn_weights
+        for side in (0, 1):
+            multiplier = 1 if side == self.side else -1
+            pawns = bitboards[make_piece(side, PAWN)]
+            enemy_pawns = bitboards[make_piece(side ^ 1, PAWN)]
+            for x in range(8):
+                count = pop_count(pawns & FILE_MASKS[x])
+                if count > 1:
+                    score += weights['doubled'] * count * multiplier
+                if count and not pawns & ADJACENT_FILES[x]:
+                    score += weights['isolated'] * count * multiplier
+            remaining = pawns
+            while remaining:
+                low = remaining & -remaining
+                sq = low.bit_length() - 1
+                remaining ^= low
+                if not enemy_pawns & PASSED_MASKS[side][sq]:
+                    advanced = 6 - (sq >> 3) if side == 0 else (sq >> 3) - 1
+                    score += self.passed_pawn_bonus[advanced] * multiplier
+            king_sq = position.king_sq[side]
+            if king_sq >= 0:
+                score += weights['shield'] * pop_count(pawns & SHIELD_MASKS[side][king_sq]) * multiplier
+        return score
+
+    def square_value(self, piece, sq):
+        """Material, position table, center, development and the other terms of a
+        piece that only depend on its square, from the AI's point of view"""
+        side = piece >> 3
+        piece_type = PIECE_NAMES[piece & 7]
+        x, y = sq & 7, sq >> 3
+        # The position tables hold multiples of 5, so 0.8 of them stays an integer
+        score = self.piece_values[piece_type] + self.evaluate_position(piece, x, y) * 4 // 5
+        score += self.control_center(piece, x, y) + self.evaluate_development(piece, x, y)
+        if piece_type == 'King':
+            if side == self.side and sq == (60 if side == 0 else 4):
+                score -= 30
+        elif piece_type == 'Queen':
+            if (side == 0 and y < 2) or (side == 1 and y > 5):
+                score -= 20
+        elif piece_type == 'Pawn':
+            progress = 7 - y if side == self.side else y
+            score += progress * 5
+        return score if side == self.side else -score
+
+    def square_value_endgame(self, piece, sq):
+        """square_value once most pieces are off: material and the endgame position tables"""
+        side = piece >> 3
+        score = (self.piece_values[PIECE_NAMES[piece & 7]]
+                 + self.evaluate_position(piece, sq & 7, sq >> 3, endgame=True) * 4 // 5)
+        return score if side == self.side else -score
+
+    def evaluate_position(self, piece, x, y, endgame=False):
         """Evaluate the value of the piece's position"""
-        piece_type = piece.__class__.__name__
+        piece_type = PIECE_NAMES[piece & 7]
+        side = piece >> 3
         if piece_type == 'Pawn':
-            return self.pawn_table[y][x] if piece.side == 0 else self.pawn_table[7-y][x]
+            table = self.pawn_endgame_table if endgame else self.pawn_table
+            return table[y][x] if side == 0 else table[7-y][x]
         elif piece_type == 'Knight':
-            return self.knight_table[y][x] if piece.side == 0 else self.knight_table[7-y][x]
+            return self.knight_table[y][x] if side == 0 else self.knight_table[7-y][x]
         elif piece_type == 'Bishop':
-            return self.bishop_table[y][x] if piece.side == 0 else self.bishop_table[7-y][x]
+            return self.bishop_table[y][x] if side == 0 else self.bishop_table[7-y][x]
         elif piece_type == 'Queen':
-            return self.queen_table[y][x] if piece.side == 0 else self.queen_table[7-y][x]
+            return self.queen_table[y][x] if side == 0 else self.queen_table[7-y][x]
         elif piece_type == 'Rook':
-            return self.rook_table[y][x] if piece.side == 0 else self.rook_table[7-y][x]
+            return self.rook_table[y][x] if side == 0 else self.rook_table[7-y][x]
+        elif piece_type == 'King':
+            table = self.king_endgame_table if endgame else self.king_table
+            return table[y][x] if side == 0 else table[7-y][x]
         return 0
 
     def evaluate_development(self, piece, x, y):
         """Evaluate the development of the piece"""
         development_score = 0
-        if piece.__class__.__name__ in ['Knight', 'Bishop']:
-            if piece.side == 0 and y > 1:  # White
+        if PIECE_NAMES[piece & 7] in ['Knight', 'Bishop']:
+            if piece >> 3 == 0 and y > 1:  # White
                 development_score += 10
-            elif piece.side == 1 and y < 6:  # Black
+            elif piece >> 3 == 1 and y < 6:  # Black
                 development_score += 10
         return development_score
 
-    def is_protected(self, piece, pieces, chessboard):
-        """Check if the piece is protected and by how many pieces"""
-        protection_count = 0
-        x, y = piece.get_position()
-        for other in pieces:
-            if other.side == piece.side and other != piece and not other.is_captured:
-                possible_moves = other.get_possible_moves(chessboard)
-                if (x, y) in possible_moves:
-                    protection_count += 1
-        return protection_count
-    
-    def is_attacking(self, piece, pieces, chessboard):
-        """Evaluate the attacking ability of a piece"""
+    def is_protected(self, position, sq):
+        """Check if the piece is protected and by how many pieces, read from the attack maps"""
+        return position.attackers_count(sq, position.squares[sq] >> 3)
+
+    def is_attacking(self, position, sq):
+        """Evaluate the attacking ability of a piece from its attack set"""
         attack_score = 0
-        possible_moves = piece.get_possible_moves(chessboard)
-        for x, y in possible_moves:
-            if 0 <= x < 8 and 0 <= y < 8:
-                target = chessboard.map[y][x]
-                if target and target.side != piece.side:
-                    attack_score += self.piece_values[target.__class__.__name__] * 0.1
+        squares = position.squares
+        targets = position.attacks[sq] & position.occupied[(squares[sq] >> 3) ^ 1]
+        while targets:
+            low = targets & -targets
+            attack_score += self.piece_values[PIECE_NAMES[squares[low.bit_length() - 1] & 7]] * 0.1
+            targets ^= low
         return attack_score
     
     def control_center(self, piece, x, y):
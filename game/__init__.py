@@ -4,7 +4,6 @@ Chess Game Package
 A chess game implementation with AI opponents.
 """
 
-from .game import Game
 from .BasicAI import BasicAI
 from .ProAI import ProAI
 
@@ -16,3 +15,12 @@ __all__ = [
     'BasicAI', 
     'ProAI'
 ]
+
+
+def __getattr__(name):
+    # Game is imported on first use only: the AI worker processes unpickle
+    # ProAI from this package and must not start pygame or load the assets
+    if name == 'Game':
+        from .game import Game
+        return Game
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
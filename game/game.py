@@ -5,7 +5,9 @@ from src.userinterface import UI, Text, Button, ProgressBar
 from utils.resource_manager import ResourceManager
 from game.BasicAI import BasicAI
 from game.ProAI import ProAI
-import os, threading, sys, random, io
+from src.engine import format_stats
+from src.engine.worker import EngineProcess
+import os, threading, sys, random, io, time
 from PIL import Image
 
 class Game:
@@ -129,12 +131,15 @@ class Game:
             (810, 100)
         )
         self.basic_ai = BasicAI()
-        self.pro_ai = ProAI()
+        if AI_USE_PROCESS:
+            self.pro_ai = EngineProcess(ProAI, hash_mb=AI_HASH_MB, workers=AI_WORKERS,
+                                        book_path=AI_BOOK_PATH, null_move=AI_NULL_MOVE, lmr=AI_LMR)
+        else:
+            self.pro_ai = ProAI(hash_mb=AI_HASH_MB, workers=AI_WORKERS, book_path=AI_BOOK_PATH,
+                                null_move=AI_NULL_MOVE, lmr=AI_LMR)
         self.ai = self.basic_ai
         self.current_turn = 0  # 0: white, 1: black
-        for piece in self.all_pieces:
-            x, y = piece.get_position()
-            self.chessboard.map[y][x] = piece
+        self.chessboard.setup(self.all_pieces)
         self.game_over = False
         self.winner = None  # 0: White wins, 1: Black wins
         self.ai_progress = ProgressBar(
@@ -147,13 +152,25 @@ class Game:
         # AI thinking
         self.ai_thinking_time = 0
         self.ai_think_duration = 1000
+        # The search must be done this many ms before ai_think_duration runs out
+        self.ai_deadline_margin = 100
         self.is_loading = True
         self.ai_thread = None
+        self.ai_cancel = None
         self.ai_move_ready = None
         self.ai_is_thinking = False
         self.ai_move_calculated = False
         self.ai_move_result = None
+        # Pondering: the Pro AI searches the expected reply during the human's turn
+        self.ponder_thread = None
+        self.ponder_cancel = None
+        # Hash of the position after the reply pondered on
+        self.ponder_hash = None
+        self.ponder_hit = False
         self.last_ai_move = None
+        # Search statistics of the AI's last move, and their side panel lines
+        self.ai_stats = None
+        self.ai_stats_text = []
         # Loading
         self.loading_time = 0
         self.loading_duration = 2000
@@ -202,9 +219,11 @@ class Game:
         """Handle events from the user"""
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
+                self.cancel_ai()
                 self.running = False
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
+                    self.cancel_ai()
                     self.running = False
                 elif event.key == pygame.K_SPACE and self.game_over:
                     self.reset_game()
@@ -215,6 +234,7 @@ class Game:
                             if new_piece:
                                 self.all_pieces.remove(piece)
                                 self.all_pieces.append(new_piece)
+                                self.chessboard.promote(new_piece)
                                 break
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if self.ai_button.is_clicked(event):
@@ -257,34 +277,51 @@ class Game:
         elif self.blackking.is_captured:
             self.game_over = True
             self.winner = 0
+        elif self.is_checkmate(self.current_turn):
+            self.game_over = True
+            self.winner = self.current_turn ^ 1
+        elif self.is_stalemate(self.current_turn):
+            self.game_over = True
+            self.winner = None
         if not self.game_over:
-            if self.current_turn == 1:  # Black's turn (AI)
+            # The AI waits while the human still picks a promotion piece: the
+            # position only holds a provisional queen until then
+            if self.current_turn == 1 and not self.is_promotion_pending():  # Black's turn (AI)
                 self.ai_thinking_time += self.clock.get_time()
                 progress = min(self.ai_thinking_time / self.ai_think_duration, 1.0)
                 self.ai_progress.set_progress(progress)
                 if not self.ai_is_thinking and not self.ai_move_calculated:
                     if not self.ai_thread or not self.ai_thread.is_alive():
+                        self.ponder_hit = self.stop_ponder()
                         self.ai_is_thinking = True
-                        self.ai_thread = threading.Thread(target=self.process_ai_move)
+                        # The last search's statistics go until this one reports
+                        self.ai_stats_text = []
+                        self.ai_cancel = threading.Event()
+                        deadline = time.perf_counter() + (self.ai_think_duration - self.ai_deadline_margin) / 1000
+                        # The search gets its own copy of the position, never the sprites
+                        self.ai_thread = threading.Thread(
+                            target=self.process_ai_move,
+                            args=(self.chessboard.position.snapshot(), deadline, self.ai_cancel))
                         self.ai_thread.start()
-                if self.ai_thinking_time >= self.ai_think_duration and self.ai_move_calculated:
-                    if self.ai_move_result:
-                        piece, (new_x, new_y) = self.ai_move_result
-                        old_x, old_y = piece.get_position()
-                        target_piece = self.chessboard.map[new_y][new_x]
-                        if target_piece is not None:
-                            if target_piece.side != piece.side:
-                                self.all_pieces.remove(target_piece)
-                                target_piece.is_captured = True
-                        piece.move(new_x, new_y)
-                        self.chessboard.map[old_y][old_x] = None
-                        self.chessboard.map[new_y][new_x] = piece
-                        self.last_ai_move = ((old_x, old_y), (new_x, new_y))                        
+                # After a ponder hit the move is played as soon as it is known
+                if self.ai_move_calculated and (self.ai_thinking_time >= self.ai_think_duration
+                                                or self.ponder_hit):
+                    move = self.ai_move_result
                     self.ai_thinking_time = 0
-                    self.current_turn = 0
                     self.ai_move_calculated = False
                     self.ai_move_result = None
                     self.ai_is_thinking = False
+                    self.ponder_hit = False
+                    # No move or one the live position no longer allows: the next
+                    # update searches again instead of handing the turn back
+                    if move is not None and move in self.chessboard.position.legal_moves():
+                        frm, to = move & 63, (move >> 6) & 63
+                        self.chessboard.apply_move(move, self.all_pieces)
+                        self.last_ai_move = ((frm & 7, frm >> 3), (to & 7, to >> 3))
+                        self.current_turn = 0
+                        self.report_ai_stats()
+                        if AI_PONDER and self.ai is self.pro_ai:
+                            self.start_ponder()
             self.whiteking.is_in_check()
             self.blackking.is_in_check()
 
@@ -316,12 +353,17 @@ class Game:
             if self.current_turn == 1:  # Black's turn (AI)
                 self.ai_progress.draw(self.screen)
                 self.ai_progress.update()                
+            for text in self.ai_stats_text:
+                text.draw(self.screen)
             if self.game_over:
                 overlay = pygame.Surface((SCREENWIDTH, SCREENHEIGHT))
                 overlay.fill((0, 0, 0))
                 overlay.set_alpha(128)
                 self.screen.blit(overlay, (0, 0))
-                winner_text = "White Wins!" if self.winner == 0 else "Black Wins!"
+                if self.winner is None:
+                    winner_text = "Draw!"
+                else:
+                    winner_text = "White Wins!" if self.winner == 0 else "Black Wins!"
                 text_surface = self.game_over_font.render(winner_text, True, (255, 215, 0))
                 text_rect = text_surface.get_rect(center=(SCREENWIDTH // 2, SCREENHEIGHT // 2 - 50))
                 self.screen.blit(text_surface, text_rect)
@@ -332,16 +374,22 @@ class Game:
         pygame.display.update()
 
     def run(self):
-        while self.running:
-            self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(FPS)
+        try:
+            while self.running:
+                self.handle_events()
+                self.update()
+                self.draw()
+                self.clock.tick(FPS)
+        finally:
+            # A ponder search only ends when told to; then the Pro AI's processes
+            self.cancel_ai()
+            self.pro_ai.close()
         pygame.mixer.music.stop()
         pygame.quit()
 
     def reset_game(self):
         """Reset the game to the initial state"""
+        self.cancel_ai()
         current_ai_mode = self.ai_mode
         current_ai = self.ai        
         resource_manager.clear_cache()
@@ -352,7 +400,10 @@ class Game:
         self.all_pieces.clear()
         self.delete_pieces.clear()        
         self.chessboard = ChessBoard()
+        self.pro_ai.new_game()
         self.last_ai_move = None
+        self.ai_stats = None
+        self.ai_stats_text = []
         # White side
         self.whiteking = King(0, boardset['e1'], self.chessboard)
         self.whitequeen = Queen(0, boardset['d1'], self.chessboard)
@@ -406,9 +457,7 @@ class Game:
             *self.blackpawns
         ]
         self.current_turn = 0
-        for piece in self.all_pieces:
-            x, y = piece.get_position()
-            self.chessboard.map[y][x] = piece
+        self.chessboard.setup(self.all_pieces)
         self.ai_mode = current_ai_mode
         self.ai = current_ai
         self.ai_button.text.update(f"AI: {self.ai_mode}")
@@ -421,24 +470,21 @@ class Game:
             x, y = piece.pos
             self.chessboard.map[y][x] = None
 
+    def is_promotion_pending(self):
+        """Whether a pawn is waiting for the human to pick its promotion piece"""
+        return any(isinstance(piece, Pawn) and piece.is_promoting for piece in self.all_pieces)
+
     def is_check(self, side):
         king = self.whiteking if side == 0 else self.blackking
         return king.is_in_check()
 
     def is_checkmate(self, side):
-        if not self.is_check(side):
-            return False
-        pieces = [p for p in self.all_pieces if p.side == side and not p.is_captured]
-        for piece in pieces:
-            moves = piece.get_possible_moves(self.chessboard)
-            for move in moves:
-                old_pos = piece.get_position()
-                piece.move(move[0], move[1])
-                still_in_check = self.is_check(side)
-                piece.move(old_pos[0], old_pos[1])
-                if not still_in_check:
-                    return False
-        return True
+        position = self.chessboard.position
+        return position.side == side and position.is_checkmate()
+
+    def is_stalemate(self, side):
+        position = self.chessboard.position
+        return position.side == side and position.is_stalemate()
     
     def save_game(self):
         """Save game"""
@@ -498,8 +544,70 @@ class Game:
         if self.resource_manager.select_game_directory():
             self.load_resources()
 
-    def process_ai_move(self):
-        """Process AI move in separate thread"""
-        self.ai_move_result = self.ai.make_move(self.all_pieces, self.chessboard)
+    def process_ai_move(self, position, deadline=None, cancel=None):
+        """Process AI move in separate thread, on a snapshot of the position"""
+        move = self.ai.make_move(position, deadline=deadline, cancel=cancel)
+        if cancel is not None and cancel.is_set():
+            # Cancelled by a restart or quit: the game it searched is gone
+            return
+        self.ai_move_result = move
         self.ai_move_calculated = True
-        self.ai_is_thinking = False
\ No newline at end of file
+        self.ai_is_thinking = False
+
+    def report_ai_stats(self):
+        """Log the statistics of the search behind the AI's move and refresh the side panel"""
+        self.ai_stats = getattr(self.ai, 'search_stats', None)
+        self.ai_stats_text = []
+        if self.ai_stats is None:
+            return
+        lines = format_stats(self.ai_stats)
+        self.resource_manager.logger.info("AI search: " + " | ".join(lines))
+        if AI_SHOW_STATS:
+            self.ai_stats_text = [Text(line, FONT_SIZES['TINY'], COLOR['BLACK'], (810, 240 + index * 20))
+                                  for index, line in enumerate(lines)]
+
+    def process_ponder(self, position, cancel):
+        """Ponder in a separate thread, on a snapshot of the position after the AI's move"""
+        # The AI may leave its own snapshot after the reply it pondered on
+        root = position.copy()
+        move = self.pro_ai.ponder(position, cancel)
+        if move is not None:
+            root.make_move(move)
+            self.ponder_hash = root.hash
+
+    def start_ponder(self):
+        """Let the Pro AI search the expected human reply until the human moves"""
+        self.ponder_hash = None
+        self.ponder_cancel = threading.Event()
+        self.ponder_thread = threading.Thread(
+            target=self.process_ponder,
+            args=(self.chessboard.position.snapshot(), self.ponder_cancel))
+        self.ponder_thread.start()
+
+    def stop_ponder(self):
+        """Stop pondering; True when the human played the reply the AI pondered on"""
+        if self.ponder_thread is None:
+            return False
+        self.ponder_cancel.set()
+        self.ponder_thread.join()
+        self.ponder_thread = None
+        self.ponder_cancel = None
+        # Compared by hash: after an underpromotion the last undo record still
+        # holds the provisional queen promotion
+        return (self.ai is self.pro_ai and self.ponder_hash is not None
+                and self.chessboard.position.hash == self.ponder_hash)
+
+    def cancel_ai(self):
+        """Stop a running AI search and pondering, and wait for their threads to finish"""
+        self.stop_ponder()
+        self.ponder_hit = False
+        if self.ai_cancel is not None:
+            self.ai_cancel.set()
+        if self.ai_thread is not None and self.ai_thread.is_alive():
+            self.ai_thread.join()
+        self.ai_thread = None
+        self.ai_cancel = None
+        self.ai_is_thinking = False
+        self.ai_move_calculated = False
+        self.ai_move_result = None
+        self.ai_thinking_time = 0
\ No newline at end of file
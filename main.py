@@ -1,5 +1,10 @@
-from game.game import Game
+import multiprocessing
 
 if __name__ == "__main__":
+    # Imported here: the AI worker processes re-run this module as __mp_main__
+    # and must not start pygame
+    from game.game import Game
+    # The AI worker process of a frozen build starts through this executable
+    multiprocessing.freeze_support()
     game = Game()
     game.run()
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""
+Chess engine core
+-----------------
+Pygame-free position, rules and search used by the AI. Nothing in this
+package loads assets or initialises pygame.
+"""
+
+from .position import (
+    Position, WHITE, BLACK, EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+    PIECE_NAMES, PIECE_TYPES, START_FEN, PHASE_WEIGHTS, MAX_PHASE,
+    make_piece, square, square_name, parse_square,
+    encode_move, move_from, move_to, move_promo, move_flag, move_to_uci,
+    pack_score, unpack_score, taper, MOVE_GENERATORS,
+)
+from .movegen import generate_moves
+from .bitboard import generate_legal_moves
+from .search import Search, format_stats
+from .tt import TranspositionTable, SharedTranspositionTable
+from .zobrist import compute_hash
+
+__all__ = [
+    'Position', 'WHITE', 'BLACK', 'EMPTY', 'PAWN', 'KNIGHT', 'BISHOP', 'ROOK', 'QUEEN', 'KING',
+    'PIECE_NAMES', 'PIECE_TYPES', 'START_FEN', 'PHASE_WEIGHTS', 'MAX_PHASE',
+    'make_piece', 'square', 'square_name', 'parse_square',
+    'encode_move', 'move_from', 'move_to', 'move_promo', 'move_flag', 'move_to_uci',
+    'pack_score', 'unpack_score', 'taper', 'MOVE_GENERATORS', 'generate_moves',
+    'generate_legal_moves', 'Search', 'format_stats', 'TranspositionTable', 'SharedTranspositionTable',
+    'compute_hash',
+]
@@ -0,0 +1,149 @@
+"""
+Batch evaluation with NumPy.
+
+A board is encoded as 12 piece planes of 64 squares (white pawn to white king,
+then black pawn to black king), and a whole batch of boards is scored with one
+matrix product against a piece-square table, the same table[piece][sq] that
+Position.psq sums incrementally. A tapered evaluator takes a table of packed
+middlegame/endgame scores and blends the two sums by each board's game phase.
+fit_table goes the other way for offline tuning: it finds the (plain) table
+whose scores best match target scores.
+
+    python -m src.engine.batch                  # positions/second against ProAI.evaluate_board
+    python -m src.engine.batch --positions 5000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from .position import (Position, WHITE, BLACK, PAWN, KING, PHASE_WEIGHTS, MAX_PHASE, make_piece,
+                       unpack_score, taper)
+
+PLANE_PIECES = [make_piece(side, piece_type) for side in (WHITE, BLACK)
+                for piece_type in range(PAWN, KING + 1)]
+PLANES = len(PLANE_PIECES)
+
+_PLANE_CODES = np.array(PLANE_PIECES, dtype=np.int8).reshape(1, PLANES, 1)
+# Position.phase as one weight per encoded column
+_PHASE_COLUMNS = np.repeat([PHASE_WEIGHTS[piece & 7] for piece in PLANE_PIECES], 64).astype(np.float64)
+
+
+def encode(boards):
+    """(n, 12 * 64) array of 0/1 from n lists of 64 piece codes (Position.squares):
+    column plane * 64 + sq is set when that plane's piece stands on sq"""
+    codes = np.array(boards, dtype=np.int8).reshape(-1, 1, 64)
+    return (codes == _PLANE_CODES).reshape(len(boards), PLANES * 64).astype(np.float64)
+
+
+def table_weights(table):
+    """A table[piece][sq] as one weight per encoded column"""
+    return np.array([table[piece] for piece in PLANE_PIECES], dtype=np.float64).reshape(-1)
+
+
+class BatchEvaluator:
+    """Scores many boards at once with a piece-square table"""
+
+    def __init__(self, table, tapered=False):
+        """tapered: the table holds packed scores (pack_score) to blend by game phase"""
+        self.tapered = tapered
+        if tapered:
+            self.weights = table_weights([[unpack_score(value)[0] for value in row] for row in table])
+            self.endgame_weights = table_weights([[unpack_score(value)[1] for value in row] for row in table])
+        else:
+            self.weights = table_weights(table)
+
+    def evaluate(self, positions):
+        """Array of the positions' scores, each what position.psq holds with the table installed
+        (taper(position.psq, position.phase) for a tapered evaluator)"""
+        return self.evaluate_boards([position.squares for position in positions])
+
+    def evaluate_boards(self, boards):
+        if not boards:
+            return np.zeros(0)
+        features = encode(boards)
+        if not self.tapered:
+            return features @ self.weights
+        phase = np.minimum(features @ _PHASE_COLUMNS, MAX_PHASE)
+        return (features @ self.weights * phase
+                + features @ self.endgame_weights * (MAX_PHASE - phase)) / MAX_PHASE
+
+    def evaluate_moves(self, position, moves):
+        """Array of the scores of the positions after each move"""
+        boards = []
+        for move in moves:
+            position.make_move(move)
+            boards.append(position.squares[:])
+            position.unmake_move()
+        return self.evaluate_boards(boards)
+
+
+def fit_table(positions, targets, ridge=1.0):
+    """Piece-square table whose batch scores best match the target scores, by
+    ridge-regularised least squares; rows of pieces never seen stay near zero"""
+    features = encode([position.squares for position in positions])
+    targets = np.asarray(targets, dtype=np.float64)
+    weights = np.linalg.solve(features.T @ features + ridge * np.eye(features.shape[1]),
+                              features.T @ targets)
+    table = [[0] * 64 for _ in range(15)]
+    for plane, piece in enumerate(PLANE_PIECES):
+        table[piece] = [int(round(value)) for value in weights[plane * 64:(plane + 1) * 64]]
+    return table
+
+
+def sample_positions(count, seed=0, plies=60):
+    """Positions from random games out of the perft reference positions"""
+    from .perft import REFERENCE_POSITIONS
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        _, fen, _ = rng.choice(REFERENCE_POSITIONS)
+        position = Position.from_fen(fen)
+        for _ in range(rng.randrange(plies)):
+            moves = position.legal_moves()
+            if not moves:
+                break
+            position.make_move(rng.choice(moves))
+        positions.append(position.snapshot())
+    return positions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch evaluation throughput benchmark")
+    parser.add_argument('--positions', type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    # The Pro AI's table and evaluate_board are what the batch is measured against
+    from game.ProAI import ProAI
+    ai = ProAI()
+    positions = sample_positions(args.positions)
+    for position in positions:
+        position.set_psq_table(ai.psq_table)
+    evaluator = BatchEvaluator(ai.psq_table, tapered=True)
+
+    start = time.perf_counter()
+    for position in positions:
+        ai.evaluate_board(position)
+    scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scores = evaluator.evaluate(positions)
+    batch = time.perf_counter() - start
+
+    boards = encode([position.squares for position in positions])
+    start = time.perf_counter()
+    boards @ evaluator.weights
+    product = time.perf_counter() - start
+
+    assert all(abs(score - taper(position.psq, position.phase)) < 1e-6
+               for score, position in zip(scores, positions))
+    count = len(positions)
+    print(f"evaluate_board        {int(count / scalar):>10} positions/s")
+    print(f"batch (with encoding) {int(count / batch):>10} positions/s  piece-square terms only")
+    print(f"batch (product only)  {int(count / max(product, 1e-9)):>10} positions/s")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
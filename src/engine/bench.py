@@ -0,0 +1,76 @@
+"""
+Fixed-depth search benchmark.
+
+Searches the perft reference positions to the same depth with null-move
+pruning and late-move reductions switched on and off, so the nodes each
+technique saves are measured on identical work.
+
+    python -m src.engine.bench                  # depth 5 with the Pro AI's evaluation
+    python -m src.engine.bench --depth 6 --material
+"""
+import argparse
+import time
+
+from .perft import REFERENCE_POSITIONS
+from .position import Position, move_to_uci
+from .search import Search
+from .smp import material
+from .tt import TranspositionTable
+
+# (name, Search options) of every configuration compared
+CONFIGURATIONS = [
+    ('plain', {'null_move': False, 'lmr': False}),
+    ('null move', {'null_move': True, 'lmr': False}),
+    ('lmr', {'null_move': False, 'lmr': True}),
+    ('null move+lmr', {'null_move': True, 'lmr': True}),
+]
+
+
+def bench(depth, evaluate, psq_table=None, hash_mb=16, report=print, **options):
+    """Search every reference position to depth with a fresh table,
+    returns (total nodes, seconds, {position name: best move})"""
+    searcher = Search(evaluate, TranspositionTable(hash_mb), psq_table, **options)
+    nodes = 0
+    elapsed = 0.0
+    moves = {}
+    for name, fen, _ in REFERENCE_POSITIONS:
+        searcher.tt.clear()
+        position = Position.from_fen(fen)
+        start = time.perf_counter()
+        move = searcher.search(position, max_depth=depth)
+        elapsed += time.perf_counter() - start
+        nodes += searcher.nodes
+        moves[name] = move
+        report(f"  {name:<11} {searcher.nodes:>9} nodes  {move_to_uci(move)}")
+    return nodes, elapsed, moves
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fixed-depth search node count benchmark")
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--material', action='store_true',
+                        help="evaluate material only instead of with the Pro AI's evaluation")
+    args = parser.parse_args(argv)
+
+    if args.material:
+        evaluate, psq_table = material, None
+    else:
+        # Imported here: the engine does not depend on the game
+        from game.ProAI import ProAI
+        ai = ProAI()
+        evaluate, psq_table = ai.evaluate, ai.psq_table
+
+    base = None
+    for name, options in CONFIGURATIONS:
+        print(f"{name} (depth {args.depth})")
+        nodes, elapsed, moves = bench(args.depth, evaluate, psq_table, **options)
+        if base is None:
+            base = nodes, moves
+        same = sum(move == base[1][position] for position, move in moves.items())
+        print(f"  {'total':<11} {nodes:>9} nodes  {elapsed:6.2f}s  {nodes / base[0]:6.1%} of plain  "
+              f"{same}/{len(moves)} same moves")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
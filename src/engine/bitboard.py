@@ -0,0 +1,366 @@
+"""
+Bitboard move generation.
+
+Every set of squares is a Python int with bit n standing for square n
+(a8 = bit 0, h1 = bit 63). Knight, king and pawn attacks come from
+precomputed tables, sliding attacks from per-line tables indexed by the occupancy of the
+rank, file or diagonal through the square.
+"""
+from .position import (
+    WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+    CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ,
+    FLAG_DOUBLE, FLAG_EN_PASSANT, FLAG_CASTLE,
+)
+from .movegen import KNIGHT_TARGETS, KING_TARGETS, PAWN_CAPTURES
+
+FULL = (1 << 64) - 1
+FILE_A = sum(1 << (row * 8) for row in range(8))
+FILE_H = FILE_A << 7
+ROW_MASKS = [0xFF << (row * 8) for row in range(8)]
+
+
+def _mask(squares):
+    bb = 0
+    for sq in squares:
+        bb |= 1 << sq
+    return bb
+
+
+def bit_squares(bb):
+    """Square indices of the set bits, lowest first"""
+    squares = []
+    while bb:
+        low = bb & -bb
+        squares.append(low.bit_length() - 1)
+        bb ^= low
+    return squares
+
+
+def pop_count(bb):
+    return bin(bb).count('1')
+
+
+KNIGHT_ATTACKS = [_mask(targets) for targets in KNIGHT_TARGETS]
+KING_ATTACKS = [_mask(targets) for targets in KING_TARGETS]
+# PAWN_ATTACKS[side][sq]: squares a pawn of that side on sq attacks
+PAWN_ATTACKS = [[_mask(targets) for targets in PAWN_CAPTURES[side]] for side in (WHITE, BLACK)]
+
+
+def _ray(sq, dx, dy, occupied=0):
+    """Squares seen from sq in one direction, up to and including the first blocker"""
+    x, y = sq & 7, sq >> 3
+    bb = 0
+    x, y = x + dx, y + dy
+    while 0 <= x < 8 and 0 <= y < 8:
+        bb |= 1 << (y * 8 + x)
+        if occupied & (1 << (y * 8 + x)):
+            break
+        x, y = x + dx, y + dy
+    return bb
+
+
+def _line_table(dx, dy):
+    """Attack lookup along one line through each square, keyed by the line's occupancy"""
+    masks, tables = [], []
+    for sq in range(64):
+        mask = _ray(sq, dx, dy) | _ray(sq, -dx, -dy)
+        table = {}
+        subset = 0
+        while True:
+            table[subset] = _ray(sq, dx, dy, subset) | _ray(sq, -dx, -dy, subset)
+            subset = (subset - mask) & mask
+            if not subset:
+                break
+        masks.append(mask)
+        tables.append(table)
+    return masks, tables
+
+
+# Sliding attacks: mask the occupancy down to one line and look the result up,
+# a collision-free stand-in for magic multiplication
+RANK_MASK, RANK_ATTACKS = _line_table(1, 0)
+FILE_MASK, FILE_ATTACKS = _line_table(0, 1)
+DIAGONAL_MASK, DIAGONAL_ATTACKS = _line_table(1, 1)
+ANTI_DIAGONAL_MASK, ANTI_DIAGONAL_ATTACKS = _line_table(1, -1)
+
+
+# BETWEEN[a][b]: squares strictly between two aligned squares, LINE[a][b]: the whole
+# rank, file or diagonal through both; 0 when the squares are not aligned
+BETWEEN = [[0] * 64 for _ in range(64)]
+LINE = [[0] * 64 for _ in range(64)]
+for _sq in range(64):
+    for _dx, _dy in ((1, 0), (0, 1), (1, 1), (1, -1), (-1, 0), (0, -1), (-1, -1), (-1, 1)):
+        _line = _ray(_sq, _dx, _dy) | _ray(_sq, -_dx, -_dy) | (1 << _sq)
+        _x, _y, _between = (_sq & 7) + _dx, (_sq >> 3) + _dy, 0
+        while 0 <= _x < 8 and 0 <= _y < 8:
+            BETWEEN[_sq][_y * 8 + _x] = _between
+            LINE[_sq][_y * 8 + _x] = _line
+            _between |= 1 << (_y * 8 + _x)
+            _x, _y = _x + _dx, _y + _dy
+
+
+def rook_attacks(sq, occupied):
+    return (RANK_ATTACKS[sq][occupied & RANK_MASK[sq]]
+            | FILE_ATTACKS[sq][occupied & FILE_MASK[sq]])
+
+
+def bishop_attacks(sq, occupied):
+    return (DIAGONAL_ATTACKS[sq][occupied & DIAGONAL_MASK[sq]]
+            | ANTI_DIAGONAL_ATTACKS[sq][occupied & ANTI_DIAGONAL_MASK[sq]])
+
+
+def piece_attacks(piece, sq, occupied):
+    """Squares attacked by a piece code standing on sq"""
+    piece_type = piece & 7
+    if piece_type == PAWN:
+        return PAWN_ATTACKS[piece >> 3][sq]
+    if piece_type == KNIGHT:
+        return KNIGHT_ATTACKS[sq]
+    if piece_type == KING:
+        return KING_ATTACKS[sq]
+    if piece_type == BISHOP:
+        return bishop_attacks(sq, occupied)
+    if piece_type == ROOK:
+        return rook_attacks(sq, occupied)
+    return rook_attacks(sq, occupied) | bishop_attacks(sq, occupied)
+
+
+def attackers_to(position, sq, occupied, by_side):
+    """Bitboard of the pieces of by_side attacking sq for a given occupancy"""
+    bitboards = position.bitboards
+    base = by_side << 3
+    queens = bitboards[base | QUEEN]
+    return ((PAWN_ATTACKS[by_side ^ 1][sq] & bitboards[base | PAWN])
+            | (KNIGHT_ATTACKS[sq] & bitboards[base | KNIGHT])
+            | (KING_ATTACKS[sq] & bitboards[base | KING])
+            | (bishop_attacks(sq, occupied) & (bitboards[base | BISHOP] | queens))
+            | (rook_attacks(sq, occupied) & (bitboards[base | ROOK] | queens)))
+
+
+def _pawn_moves(position, side, moves, pawns, enemy, empty, mask=FULL, en_passant=True):
+    """Pawn moves found set-wise: each target square came from target - delta.
+    Only targets inside mask are kept; en passant is left to the caller when disabled."""
+    if not pawns:
+        return
+    if side == WHITE:
+        last_row = ROW_MASKS[0]
+        single = (pawns >> 8) & empty
+        double = ((single & ROW_MASKS[5]) >> 8) & empty
+        left = ((pawns & ~FILE_A) >> 9) & enemy
+        right = ((pawns & ~FILE_H) >> 7) & enemy
+        push, left_delta, right_delta = -8, -9, -7
+    else:
+        last_row = ROW_MASKS[7]
+        single = (pawns << 8) & empty & FULL
+        double = ((single & ROW_MASKS[2]) << 8) & empty & FULL
+        left = ((pawns & ~FILE_A) << 7) & enemy & FULL
+        right = ((pawns & ~FILE_H) << 9) & enemy & FULL
+        push, left_delta, right_delta = 8, 7, 9
+    single &= mask
+    double &= mask
+    left &= mask
+    right &= mask
+    append = moves.append
+    for targets, delta, flag in ((single & ~last_row, push, 0),
+                                 (double, 2 * push, FLAG_DOUBLE << 15),
+                                 (left & ~last_row, left_delta, 0),
+                                 (right & ~last_row, right_delta, 0)):
+        while targets:
+            low = targets & -targets
+            to = low.bit_length() - 1
+            append((to - delta) | (to << 6) | flag)
+            targets ^= low
+    if (single | left | right) & last_row:
+        for targets, delta in ((single & last_row, push), (left & last_row, left_delta),
+                               (right & last_row, right_delta)):
+            while targets:
+                low = targets & -targets
+                to = low.bit_length() - 1
+                move = (to - delta) | (to << 6)
+                moves.extend((move | (QUEEN << 12), move | (ROOK << 12),
+                              move | (BISHOP << 12), move | (KNIGHT << 12)))
+                targets ^= low
+    ep = position.ep
+    if ep >= 0 and en_passant:
+        attackers = PAWN_ATTACKS[side ^ 1][ep] & pawns
+        while attackers:
+            low = attackers & -attackers
+            append((low.bit_length() - 1) | (ep << 6) | (FLAG_EN_PASSANT << 15))
+            attackers ^= low
+
+
+def _castling_moves(position, side, moves, occupied):
+    """Castling through or into an attacked square is never generated"""
+    if side == WHITE:
+        king, kingside, queenside = 60, CASTLE_WK, CASTLE_WQ
+    else:
+        king, kingside, queenside = 4, CASTLE_BK, CASTLE_BQ
+    rights = position.castling & (kingside | queenside)
+    attacked = position.attacked[side ^ 1]
+    if not rights or (attacked >> king) & 1:
+        return
+    if (rights & kingside and not occupied & (0b11 << (king + 1))
+            and not (attacked >> (king + 1)) & 0b11):
+        moves.append(king | ((king + 2) << 6) | (FLAG_CASTLE << 15))
+    if (rights & queenside and not occupied & (0b111 << (king - 3))
+            and not (attacked >> (king - 2)) & 0b11):
+        moves.append(king | ((king - 2) << 6) | (FLAG_CASTLE << 15))
+
+
+def generate_moves(position):
+    """All pseudo-legal moves for the side to move, same output as movegen.generate_moves"""
+    moves = []
+    append = moves.append
+    side = position.side
+    bitboards = position.bitboards
+    own = position.occupied[side]
+    occupied = own | position.occupied[side ^ 1]
+    targets = ~own & FULL
+    base = side << 3
+
+    _pawn_moves(position, side, moves, bitboards[base | PAWN], position.occupied[side ^ 1], ~occupied & FULL)
+    for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN, KING):
+        pieces = bitboards[base | piece_type]
+        while pieces:
+            low = pieces & -pieces
+            pieces ^= low
+            sq = low.bit_length() - 1
+            if piece_type == KNIGHT:
+                attacks = KNIGHT_ATTACKS[sq]
+            elif piece_type == BISHOP:
+                attacks = (DIAGONAL_ATTACKS[sq][occupied & DIAGONAL_MASK[sq]]
+                           | ANTI_DIAGONAL_ATTACKS[sq][occupied & ANTI_DIAGONAL_MASK[sq]])
+            elif piece_type == ROOK:
+                attacks = (RANK_ATTACKS[sq][occupied & RANK_MASK[sq]]
+                           | FILE_ATTACKS[sq][occupied & FILE_MASK[sq]])
+            elif piece_type == QUEEN:
+                attacks = (RANK_ATTACKS[sq][occupied & RANK_MASK[sq]]
+                           | FILE_ATTACKS[sq][occupied & FILE_MASK[sq]]
+                           | DIAGONAL_ATTACKS[sq][occupied & DIAGONAL_MASK[sq]]
+                           | ANTI_DIAGONAL_ATTACKS[sq][occupied & ANTI_DIAGONAL_MASK[sq]])
+            else:
+                attacks = KING_ATTACKS[sq]
+            attacks &= targets
+            while attacks:
+                bit = attacks & -attacks
+                append(sq | ((bit.bit_length() - 1) << 6))
+                attacks ^= bit
+    _castling_moves(position, side, moves, occupied)
+    return moves
+
+
+def generate_legal_moves(position):
+    """Strictly legal moves for the side to move.
+
+    Checkers, pins and the check-evasion mask are computed once up front, so no
+    move has to be made and tested afterwards."""
+    side = position.side
+    them = side ^ 1
+    king = position.king_sq[side]
+    if king < 0:
+        # No king on the board (editing or a captured king): nothing to keep safe
+        return generate_moves(position)
+    moves = []
+    append = moves.append
+    bitboards = position.bitboards
+    own = position.occupied[side]
+    enemy = position.occupied[them]
+    occupied = own | enemy
+    base = side << 3
+    enemy_base = them << 3
+    enemy_rooks = bitboards[enemy_base | ROOK] | bitboards[enemy_base | QUEEN]
+    enemy_bishops = bitboards[enemy_base | BISHOP] | bitboards[enemy_base | QUEEN]
+    checkers = attackers_to(position, king, occupied, them)
+
+    # The attack maps stop at the king, so a slider checking along a line also
+    # covers the square behind the king on that line
+    danger = position.attacked[them]
+    sliders = checkers & (enemy_rooks | enemy_bishops)
+    while sliders:
+        low = sliders & -sliders
+        danger |= LINE[king][low.bit_length() - 1] & ~low
+        sliders ^= low
+    attacks = KING_ATTACKS[king] & ~own & ~danger
+    while attacks:
+        bit = attacks & -attacks
+        append(king | ((bit.bit_length() - 1) << 6))
+        attacks ^= bit
+    if checkers & (checkers - 1):
+        return moves
+
+    if checkers:
+        # Single check: capture the checker or block the line to it
+        mask = checkers | BETWEEN[king][checkers.bit_length() - 1]
+    else:
+        mask = FULL
+        _castling_moves(position, side, moves, occupied)
+
+    # A piece is pinned when it is the only piece between the king and an enemy slider
+    pinned = 0
+    pin_masks = {}
+    snipers = ((rook_attacks(king, enemy) & enemy_rooks)
+               | (bishop_attacks(king, enemy) & enemy_bishops))
+    while snipers:
+        low = snipers & -snipers
+        snipers ^= low
+        sniper = low.bit_length() - 1
+        blockers = BETWEEN[king][sniper] & occupied
+        if blockers and not blockers & (blockers - 1) and blockers & own:
+            pinned |= blockers
+            pin_masks[blockers.bit_length() - 1] = BETWEEN[king][sniper] | low
+
+    pawns = bitboards[base | PAWN]
+    empty = ~occupied & FULL
+    _pawn_moves(position, side, moves, pawns & ~pinned, enemy, empty, mask, False)
+    pinned_pawns = pawns & pinned
+    while pinned_pawns:
+        low = pinned_pawns & -pinned_pawns
+        pinned_pawns ^= low
+        _pawn_moves(position, side, moves, low, enemy, empty,
+                    mask & pin_masks[low.bit_length() - 1], False)
+    ep = position.ep
+    if ep >= 0:
+        victim = ep + 8 if side == WHITE else ep - 8
+        # Legal only if it resolves any check and no slider sees the king once
+        # both pawns have left their squares
+        if not checkers or checkers == 1 << victim or (mask >> ep) & 1:
+            attackers = PAWN_ATTACKS[them][ep] & pawns
+            while attackers:
+                low = attackers & -attackers
+                attackers ^= low
+                after = (occupied ^ low ^ (1 << victim)) | (1 << ep)
+                if not (rook_attacks(king, after) & enemy_rooks
+                        or bishop_attacks(king, after) & enemy_bishops):
+                    append((low.bit_length() - 1) | (ep << 6) | (FLAG_EN_PASSANT << 15))
+
+    targets = ~own & mask
+    for piece_type in (KNIGHT, BISHOP, ROOK, QUEEN):
+        pieces = bitboards[base | piece_type]
+        if piece_type == KNIGHT:
+            # A pinned knight can never stay on the pin line
+            pieces &= ~pinned
+        while pieces:
+            low = pieces & -pieces
+            pieces ^= low
+            sq = low.bit_length() - 1
+            if piece_type == KNIGHT:
+                attacks = KNIGHT_ATTACKS[sq]
+            elif piece_type == BISHOP:
+                attacks = (DIAGONAL_ATTACKS[sq][occupied & DIAGONAL_MASK[sq]]
+                           | ANTI_DIAGONAL_ATTACKS[sq][occupied & ANTI_DIAGONAL_MASK[sq]])
+            elif piece_type == ROOK:
+                attacks = (RANK_ATTACKS[sq][occupied & RANK_MASK[sq]]
+                           | FILE_ATTACKS[sq][occupied & FILE_MASK[sq]])
+            else:
+                attacks = (RANK_ATTACKS[sq][occupied & RANK_MASK[sq]]
+                           | FILE_ATTACKS[sq][occupied & FILE_MASK[sq]]
+                           | DIAGONAL_ATTACKS[sq][occupied & DIAGONAL_MASK[sq]]
+                           | ANTI_DIAGONAL_ATTACKS[sq][occupied & ANTI_DIAGONAL_MASK[sq]])
+            attacks &= targets
+            if low & pinned:
+                attacks &= pin_masks[sq]
+            while attacks:
+                bit = attacks & -attacks
+                append(sq | ((bit.bit_length() - 1) << 6))
+                attacks ^= bit
+    return moves
@@ -0,0 +1,203 @@
+"""
+Opening book.
+
+The book file is a flat run of 16-byte records (position hash, move, weight),
+little-endian and sorted by hash, so it is opened with mmap and searched in
+place: nothing is parsed at startup and a lookup is one binary search. The
+hashes are the engine's own Zobrist keys, so the book has to be rebuilt if
+those ever change.
+
+    python -m src.engine.book games.pgn more.pgn -o assets/book/book.bin
+    python -m src.engine.book --probe "<fen>" -o assets/book/book.bin
+"""
+import argparse
+import mmap
+import random
+import re
+import struct
+from collections import Counter
+
+from .position import (Position, START_FEN, EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+                       FLAG_CASTLE, parse_square, move_to_uci)
+
+RECORD = struct.Struct('<QII')
+KEY = struct.Struct('<Q')
+
+# Plies of each game that go into the book
+DEFAULT_PLIES = 20
+
+_SAN_PIECES = {'N': KNIGHT, 'B': BISHOP, 'R': ROOK, 'Q': QUEEN, 'K': KING}
+_SAN = re.compile(r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$')
+_RESULTS = {'1-0', '0-1', '1/2-1/2', '*'}
+
+
+class OpeningBook:
+    """Read-only view of a book file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        size = self.file.seek(0, 2)
+        self.count = size // RECORD.size
+        # mmap refuses empty files
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.count else b''
+
+    def lookup(self, key):
+        """[(move, weight)] stored for a position hash, best first"""
+        data = self.data
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if KEY.unpack_from(data, mid * RECORD.size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        entries = []
+        for index in range(lo, self.count):
+            record_key, move, weight = RECORD.unpack_from(data, index * RECORD.size)
+            if record_key != key:
+                break
+            entries.append((move, weight))
+        return entries
+
+    def choose(self, position, moves=None, rng=random):
+        """A book move for the position picked by weight, None when out of book.
+        moves, when given, limits the choice to those moves (e.g. the legal ones)."""
+        entries = [(move, weight) for move, weight in self.lookup(position.hash)
+                   if moves is None or move in moves]
+        total = sum(weight for _, weight in entries)
+        if not total:
+            return None
+        pick = rng.randrange(total)
+        for move, weight in entries:
+            pick -= weight
+            if pick < 0:
+                return move
+
+    def close(self):
+        if self.count:
+            self.data.close()
+        self.file.close()
+
+
+def parse_san(position, san):
+    """The legal move written as san (e.g. 'Nbd7', 'exd6', 'e8=Q+', 'O-O'), None if there is none"""
+    san = san.rstrip('+#!?')
+    moves = position.legal_moves()
+    if san in ('O-O', '0-0', 'O-O-O', '0-0-0'):
+        to_file = 6 if len(san) == 3 else 2
+        for move in moves:
+            if move >> 15 == FLAG_CASTLE and ((move >> 6) & 63) & 7 == to_file:
+                return move
+        return None
+    match = _SAN.match(san)
+    if match is None:
+        return None
+    piece, from_file, from_rank, to_name, promo = match.groups()
+    piece_type = _SAN_PIECES[piece] if piece else PAWN
+    to = parse_square(to_name)
+    promo = _SAN_PIECES[promo] if promo else EMPTY
+    found = None
+    for move in moves:
+        frm = move & 63
+        if ((move >> 6) & 63 != to or position.squares[frm] & 7 != piece_type
+                or (move >> 12) & 7 != promo):
+            continue
+        if from_file and frm & 7 != ord(from_file) - ord('a'):
+            continue
+        if from_rank and frm >> 3 != 8 - int(from_rank):
+            continue
+        if found is not None:
+            # Ambiguous
+            return None
+        found = move
+    return found
+
+
+def read_pgn(text):
+    """The SAN move lists of the games in PGN text; games starting from a FEN are skipped"""
+    text = re.sub(r'\{[^}]*\}', ' ', text)
+    games = []
+    moves = []
+    skip = False
+    depth = 0
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith('%') or line.startswith(';'):
+            continue
+        if line.startswith('['):
+            if moves and not skip:
+                games.append(moves)
+            if moves:
+                moves, skip = [], False
+            if line.startswith('[FEN ') or line.startswith('[SetUp "1"'):
+                skip = True
+            continue
+        for token in line.split(';')[0].replace('(', ' ( ').replace(')', ' ) ').split():
+            if token == '(':
+                depth += 1
+            elif token == ')':
+                depth = max(depth - 1, 0)
+            elif depth or token.startswith('$'):
+                continue
+            elif token in _RESULTS:
+                if moves and not skip:
+                    games.append(moves)
+                moves, skip = [], False
+            else:
+                token = re.sub(r'^\d+\.+', '', token)
+                if token:
+                    moves.append(token)
+    if moves and not skip:
+        games.append(moves)
+    return games
+
+
+def build_book(pgn_paths, out_path, plies=DEFAULT_PLIES, min_weight=1):
+    """Compile the first plies of every game in the PGN files into a book file,
+    the weight of a move being the number of games that played it. Returns the
+    number of records written."""
+    counts = Counter()
+    for path in pgn_paths:
+        with open(path, encoding='utf-8', errors='replace') as pgn:
+            games = read_pgn(pgn.read())
+        for sans in games:
+            position = Position.from_fen(START_FEN)
+            for san in sans[:plies]:
+                move = parse_san(position, san)
+                if move is None:
+                    break
+                counts[position.hash, move] += 1
+                position.make_move(move)
+    records = sorted((key, -weight, move) for (key, move), weight in counts.items()
+                     if weight >= min_weight)
+    with open(out_path, 'wb') as book:
+        for key, weight, move in records:
+            book.write(RECORD.pack(key, move, min(-weight, 0xFFFFFFFF)))
+    return len(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or probe an opening book")
+    parser.add_argument('pgn', nargs='*', help="PGN files to build the book from")
+    parser.add_argument('-o', '--output', required=True, help="book file")
+    parser.add_argument('--plies', type=int, default=DEFAULT_PLIES, help="plies per game to keep")
+    parser.add_argument('--min-games', type=int, default=1, help="drop moves played in fewer games")
+    parser.add_argument('--probe', metavar='FEN', help="print the book moves of a position instead")
+    args = parser.parse_args(argv)
+
+    if args.probe:
+        book = OpeningBook(args.output)
+        for move, weight in book.lookup(Position.from_fen(args.probe).hash):
+            print(f"{move_to_uci(move)}: {weight}")
+        book.close()
+        return 0
+    if not args.pgn:
+        parser.error("no PGN files given")
+    records = build_book(args.pgn, args.output, args.plies, args.min_games)
+    print(f"{records} positions/moves written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
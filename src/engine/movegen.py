@@ -0,0 +1,162 @@
+"""
+Pseudo-legal move generation on the 64-square array of a Position.
+"""
+from .position import (
+    WHITE, BLACK, EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+    CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ,
+    FLAG_DOUBLE, FLAG_EN_PASSANT, FLAG_CASTLE,
+)
+
+KNIGHT_OFFSETS = [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
+KING_OFFSETS = [(-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)]
+ROOK_DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+BISHOP_DIRECTIONS = [(-1, -1), (1, -1), (-1, 1), (1, 1)]
+
+
+def _targets(offsets):
+    table = []
+    for sq in range(64):
+        x, y = sq & 7, sq >> 3
+        table.append([(y + dy) * 8 + x + dx for dx, dy in offsets
+                      if 0 <= x + dx < 8 and 0 <= y + dy < 8])
+    return table
+
+
+def _rays(directions):
+    table = []
+    for sq in range(64):
+        x, y = sq & 7, sq >> 3
+        rays = []
+        for dx, dy in directions:
+            ray = []
+            cx, cy = x + dx, y + dy
+            while 0 <= cx < 8 and 0 <= cy < 8:
+                ray.append(cy * 8 + cx)
+                cx += dx
+                cy += dy
+            if ray:
+                rays.append(ray)
+        table.append(rays)
+    return table
+
+
+KNIGHT_TARGETS = _targets(KNIGHT_OFFSETS)
+KING_TARGETS = _targets(KING_OFFSETS)
+ROOK_RAYS = _rays(ROOK_DIRECTIONS)
+BISHOP_RAYS = _rays(BISHOP_DIRECTIONS)
+QUEEN_RAYS = [ROOK_RAYS[sq] + BISHOP_RAYS[sq] for sq in range(64)]
+SLIDER_RAYS = {BISHOP: BISHOP_RAYS, ROOK: ROOK_RAYS, QUEEN: QUEEN_RAYS}
+# Squares from which a pawn of the given side attacks the square
+PAWN_ATTACKERS = [_targets([(-1, 1), (1, 1)]), _targets([(-1, -1), (1, -1)])]
+PAWN_CAPTURES = [PAWN_ATTACKERS[BLACK], PAWN_ATTACKERS[WHITE]]
+
+PROMOTIONS = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+
+def is_square_attacked(squares, sq, by_side):
+    """Whether any piece of by_side attacks the square"""
+    base = by_side << 3
+    for origin in PAWN_ATTACKERS[by_side][sq]:
+        if squares[origin] == base | PAWN:
+            return True
+    for origin in KNIGHT_TARGETS[sq]:
+        if squares[origin] == base | KNIGHT:
+            return True
+    for origin in KING_TARGETS[sq]:
+        if squares[origin] == base | KING:
+            return True
+    rook, bishop, queen = base | ROOK, base | BISHOP, base | QUEEN
+    for ray in ROOK_RAYS[sq]:
+        for origin in ray:
+            piece = squares[origin]
+            if piece != EMPTY:
+                if piece == rook or piece == queen:
+                    return True
+                break
+    for ray in BISHOP_RAYS[sq]:
+        for origin in ray:
+            piece = squares[origin]
+            if piece != EMPTY:
+                if piece == bishop or piece == queen:
+                    return True
+                break
+    return False
+
+
+def _pawn_moves(position, sq, side, moves):
+    squares = position.squares
+    forward = -8 if side == WHITE else 8
+    start_row, last_row = (6, 0) if side == WHITE else (1, 7)
+    to = sq + forward
+    promoting = to >> 3 == last_row
+    if squares[to] == EMPTY:
+        if promoting:
+            moves.extend(sq | (to << 6) | (promo << 12) for promo in PROMOTIONS)
+        else:
+            moves.append(sq | (to << 6))
+            if sq >> 3 == start_row and squares[to + forward] == EMPTY:
+                moves.append(sq | ((to + forward) << 6) | (FLAG_DOUBLE << 15))
+    for to in PAWN_CAPTURES[side][sq]:
+        target = squares[to]
+        if target != EMPTY and target >> 3 != side:
+            if promoting:
+                moves.extend(sq | (to << 6) | (promo << 12) for promo in PROMOTIONS)
+            else:
+                moves.append(sq | (to << 6))
+        elif to == position.ep:
+            moves.append(sq | (to << 6) | (FLAG_EN_PASSANT << 15))
+
+
+def _castling_moves(position, side, moves):
+    squares = position.squares
+    enemy = side ^ 1
+    if side == WHITE:
+        king, kingside, queenside = 60, CASTLE_WK, CASTLE_WQ
+    else:
+        king, kingside, queenside = 4, CASTLE_BK, CASTLE_BQ
+    if not position.castling & (kingside | queenside):
+        return
+    if is_square_attacked(squares, king, enemy):
+        return
+    if (position.castling & kingside and squares[king + 1] == EMPTY and squares[king + 2] == EMPTY
+            and not is_square_attacked(squares, king + 1, enemy)):
+        moves.append(king | ((king + 2) << 6) | (FLAG_CASTLE << 15))
+    if (position.castling & queenside and squares[king - 1] == EMPTY and squares[king - 2] == EMPTY
+            and squares[king - 3] == EMPTY and not is_square_attacked(squares, king - 1, enemy)):
+        moves.append(king | ((king - 2) << 6) | (FLAG_CASTLE << 15))
+
+
+def _piece_moves(position, sq, piece, moves):
+    squares = position.squares
+    side = piece >> 3
+    piece_type = piece & 7
+    if piece_type == PAWN:
+        _pawn_moves(position, sq, side, moves)
+    elif piece_type == KNIGHT or piece_type == KING:
+        for to in (KNIGHT_TARGETS if piece_type == KNIGHT else KING_TARGETS)[sq]:
+            target = squares[to]
+            if target == EMPTY or target >> 3 != side:
+                moves.append(sq | (to << 6))
+    else:
+        for ray in SLIDER_RAYS[piece_type][sq]:
+            for to in ray:
+                target = squares[to]
+                if target == EMPTY:
+                    moves.append(sq | (to << 6))
+                    continue
+                if target >> 3 != side:
+                    moves.append(sq | (to << 6))
+                break
+
+
+def generate_moves(position):
+    """All pseudo-legal moves for the side to move"""
+    moves = []
+    squares = position.squares
+    side = position.side
+    for sq in range(64):
+        piece = squares[sq]
+        if piece != EMPTY and piece >> 3 == side:
+            _piece_moves(position, sq, piece, moves)
+    _castling_moves(position, side, moves)
+    return moves
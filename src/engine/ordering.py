@@ -0,0 +1,73 @@
+"""
+Move ordering for the search.
+
+Moves are tried in this order: the transposition table move, captures and
+promotions by most valuable victim / least valuable attacker, the two killer
+moves of the ply, then the remaining quiet moves by their history score.
+"""
+from .position import EMPTY, PAWN, FLAG_EN_PASSANT
+
+TT_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 24
+KILLER_SCORES = (1 << 23, (1 << 23) - 1)
+HISTORY_LIMIT = 1 << 22
+
+# Deepest ply the search reaches
+MAX_PLY = 64
+
+
+class MoveOrderer:
+    """Killer and history tables of one search, and the move scores built from them"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        # killers[ply]: the last two quiet moves that caused a cut-off at that ply
+        self.killers = [[0, 0] for _ in range(MAX_PLY + 1)]
+        # history[piece][to]: how often a quiet move of that piece to that square cut off, by depth
+        self.history = [[0] * 64 for _ in range(15)]
+
+    def order(self, position, moves, ply, tt_move=0):
+        """The moves sorted best first"""
+        squares = position.squares
+        killers = self.killers[ply]
+        history = self.history
+
+        def score(move):
+            if move == tt_move:
+                return TT_MOVE_SCORE
+            to = (move >> 6) & 63
+            victim = PAWN if move >> 15 == FLAG_EN_PASSANT else squares[to] & 7
+            promo = (move >> 12) & 7
+            if victim or promo:
+                # Most valuable victim first, least valuable attacker breaks ties
+                return CAPTURE_SCORE + (victim + promo) * 8 - (squares[move & 63] & 7)
+            if move == killers[0]:
+                return KILLER_SCORES[0]
+            if move == killers[1]:
+                return KILLER_SCORES[1]
+            return history[squares[move & 63]][to]
+
+        moves.sort(key=score, reverse=True)
+        return moves
+
+    def is_quiet(self, position, move):
+        return (position.squares[(move >> 6) & 63] == EMPTY and not (move >> 12) & 7
+                and move >> 15 != FLAG_EN_PASSANT)
+
+    def update(self, position, move, ply, depth):
+        """Remember a quiet move that caused a beta cut-off (call before it is played)"""
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        row = self.history[position.squares[move & 63]]
+        to = (move >> 6) & 63
+        row[to] += depth * depth
+        if row[to] > HISTORY_LIMIT:
+            # Keep history below the killers by halving the whole table
+            for table in self.history:
+                for sq in range(64):
+                    table[sq] >>= 1
+
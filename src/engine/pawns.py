@@ -0,0 +1,105 @@
+"""
+Pawn structure: the masks pawn terms are built from and a cache for their score.
+
+Pawn structure rarely changes between neighbouring nodes, so its evaluation is
+cached under pawn_key, the pawn hash mixed with both king squares (pawn
+shields depend on where the kings stand). The cache has a fixed number of
+slots and a new entry simply evicts the one sharing its slot.
+"""
+from .position import WHITE, BLACK, KING, make_piece
+from .zobrist import PIECE_KEYS
+
+DEFAULT_ENTRIES = 1 << 14
+
+# FILE_MASKS[x]: every square of file x; ADJACENT_FILES[x]: the files beside it
+FILE_MASKS = [sum(1 << (y * 8 + x) for y in range(8)) for x in range(8)]
+ADJACENT_FILES = [(FILE_MASKS[x - 1] if x > 0 else 0) | (FILE_MASKS[x + 1] if x < 7 else 0)
+                  for x in range(8)]
+
+
+def _ahead(side, sq, files, ranks=8):
+    """Squares of the given files in front of sq from side's point of view, up to ranks rows"""
+    x, y = sq & 7, sq >> 3
+    step = -1 if side == WHITE else 1
+    mask = 0
+    for distance in range(1, ranks + 1):
+        row = y + step * distance
+        if not 0 <= row < 8:
+            break
+        for file in files:
+            if 0 <= file < 8:
+                mask |= 1 << (row * 8 + file)
+    return mask
+
+
+# PASSED_MASKS[side][sq]: enemy pawns here stop a pawn on sq from being passed
+PASSED_MASKS = [[_ahead(side, sq, ((sq & 7) - 1, sq & 7, (sq & 7) + 1)) for sq in range(64)]
+                for side in (WHITE, BLACK)]
+# SHIELD_MASKS[side][sq]: the two rows in front of a king on sq, on its file and both neighbours
+SHIELD_MASKS = [[_ahead(side, sq, ((sq & 7) - 1, sq & 7, (sq & 7) + 1), 2) for sq in range(64)]
+                for side in (WHITE, BLACK)]
+
+_KING_KEYS = [PIECE_KEYS[make_piece(side, KING)] for side in (WHITE, BLACK)]
+
+
+def pawn_key(position):
+    """Cache key of a position's pawn structure together with the king squares"""
+    key = position.pawn_hash
+    for side in (WHITE, BLACK):
+        king_sq = position.king_sq[side]
+        if king_sq >= 0:
+            key ^= _KING_KEYS[side][king_sq]
+    return key
+
+
+class PawnHashTable:
+    """Fixed-size cache of pawn structure scores"""
+
+    def __init__(self, entries=DEFAULT_ENTRIES):
+        size = 1
+        while size * 2 <= entries:
+            size *= 2
+        self.mask = size - 1
+        self.keys = [None] * size
+        self.values = [0] * size
+        self.reset_stats()
+
+    def clear(self):
+        self.keys = [None] * len(self.keys)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def probe(self, key):
+        """The score stored for the key, or None"""
+        self.probes += 1
+        slot = key & self.mask
+        if self.keys[slot] == key:
+            self.hits += 1
+            return self.values[slot]
+        return None
+
+    def store(self, key, value):
+        slot = key & self.mask
+        if self.keys[slot] is not None and self.keys[slot] != key:
+            self.evictions += 1
+        self.keys[slot] = key
+        self.values[slot] = value
+        self.stores += 1
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def stats(self):
+        return {
+            'entries': len(self.keys),
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hit_rate(),
+            'stores': self.stores,
+            'evictions': self.evictions,
+        }
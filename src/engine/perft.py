@@ -0,0 +1,136 @@
+"""
+Perft: count the leaf nodes of the move tree to a fixed depth.
+
+The counts of the reference positions below are the published ones, so any
+difference points at a move generation or make/unmake bug. The timings are the
+baseline every move generation and board representation change is measured
+against.
+
+    python -m src.engine.perft                      # whole suite, nodes/second
+    python -m src.engine.perft --depth 3 --divide   # per-root-move counts
+    python -m src.engine.perft --fen "<fen>" --depth 4 --hash
+"""
+import argparse
+import time
+
+from .position import Position, START_FEN, MOVE_GENERATORS, move_to_uci
+
+# (name, fen, {depth: nodes})
+REFERENCE_POSITIONS = [
+    ('start', START_FEN,
+     {1: 20, 2: 400, 3: 8902, 4: 197281, 5: 4865609}),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+     {1: 48, 2: 2039, 3: 97862, 4: 4085603}),
+    ('endgame', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+     {1: 14, 2: 191, 3: 2812, 4: 43238, 5: 674624}),
+    ('promotions', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+     {1: 6, 2: 264, 3: 9467, 4: 422333}),
+    ('talkchess', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+     {1: 44, 2: 1486, 3: 62379, 4: 2103487}),
+    ('middlegame', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+     {1: 46, 2: 2079, 3: 89890, 4: 3894594}),
+]
+
+# Depth the suite runs each position at by default, roughly a second per position
+SUITE_DEPTHS = {'start': 4, 'kiwipete': 3, 'endgame': 5, 'promotions': 4,
+                'talkchess': 3, 'middlegame': 3}
+
+
+def perft(position, depth, generator='legal', table=None):
+    """Leaf nodes below the position; table, when given, caches subtree counts"""
+    if depth == 0:
+        return 1
+    if table is not None:
+        key = (position.hash, depth)
+        nodes = table.get(key)
+        if nodes is not None:
+            return nodes
+    moves = MOVE_GENERATORS[generator](position)
+    if generator == 'legal':
+        if depth == 1:
+            nodes = len(moves)
+        else:
+            nodes = 0
+            for move in moves:
+                position.make_move(move)
+                nodes += perft(position, depth - 1, generator, table)
+                position.unmake_move()
+    else:
+        # Pseudo-legal backends: drop moves that leave the own king attacked
+        nodes = 0
+        for move in moves:
+            position.make_move(move)
+            if not position.in_check(position.side ^ 1):
+                nodes += perft(position, depth - 1, generator, table)
+            position.unmake_move()
+    if table is not None:
+        table[key] = nodes
+    return nodes
+
+
+def divide(position, depth, generator='legal', table=None):
+    """Perft split by root move, as a {uci: nodes} dict"""
+    counts = {}
+    for move in position.legal_moves():
+        position.make_move(move)
+        counts[move_to_uci(move)] = perft(position, depth - 1, generator, table)
+        position.unmake_move()
+    return counts
+
+
+def run_suite(generator='legal', depths=None, use_hash=False, report=print):
+    """Run every reference position, returns (all_correct, nodes, seconds)"""
+    depths = depths or SUITE_DEPTHS
+    all_correct = True
+    total_nodes = 0
+    total_time = 0.0
+    for name, fen, expected in REFERENCE_POSITIONS:
+        depth = depths[name] if isinstance(depths, dict) else depths
+        if depth not in expected:
+            continue
+        position = Position.from_fen(fen)
+        start = time.perf_counter()
+        nodes = perft(position, depth, generator, {} if use_hash else None)
+        elapsed = time.perf_counter() - start
+        correct = nodes == expected[depth] and position.fen() == fen
+        all_correct = all_correct and correct
+        total_nodes += nodes
+        total_time += elapsed
+        report(f"{name:<11} depth {depth}  {nodes:>9} nodes  {elapsed:6.2f}s  "
+               f"{int(nodes / max(elapsed, 1e-9)):>8} nps  {'ok' if correct else 'FAILED'}")
+    report(f"{'total':<11} {generator:<8} {total_nodes:>9} nodes  {total_time:6.2f}s  "
+           f"{int(total_nodes / max(total_time, 1e-9)):>8} nps")
+    return all_correct, total_nodes, total_time
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft move generation benchmark")
+    parser.add_argument('--fen', help="position to count instead of the reference suite")
+    parser.add_argument('--depth', type=int, help="depth (suite default: per position)")
+    parser.add_argument('--generator', default='legal', choices=sorted(MOVE_GENERATORS))
+    parser.add_argument('--divide', action='store_true', help="print the count per root move")
+    parser.add_argument('--hash', action='store_true', help="cache subtree counts (hash perft)")
+    args = parser.parse_args(argv)
+
+    if args.fen is None and not args.divide:
+        correct, _, _ = run_suite(args.generator, args.depth, args.hash)
+        return 0 if correct else 1
+
+    position = Position.from_fen(args.fen or START_FEN)
+    depth = args.depth or 3
+    table = {} if args.hash else None
+    start = time.perf_counter()
+    if args.divide:
+        counts = divide(position, depth, args.generator, table)
+        for uci in sorted(counts):
+            print(f"{uci}: {counts[uci]}")
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(position, depth, args.generator, table)
+    elapsed = time.perf_counter() - start
+    print(f"nodes {nodes}  {elapsed:.2f}s  {int(nodes / max(elapsed, 1e-9))} nps")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,598 @@
+"""
+Pygame-free position model used by the rules and the AI.
+
+Squares are numbered 0..63 in the same orientation as ChessBoard.map:
+square = y * 8 + x, so a8 is 0 and h1 is 63.
+"""
+
+WHITE, BLACK = 0, 1
+EMPTY, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(7)
+
+PIECE_NAMES = (None, 'Pawn', 'Knight', 'Bishop', 'Rook', 'Queen', 'King')
+PIECE_TYPES = {name: piece_type for piece_type, name in enumerate(PIECE_NAMES) if name}
+PIECE_LETTERS = '.pnbrqk'
+
+CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ = 1, 2, 4, 8
+
+FLAG_NORMAL, FLAG_DOUBLE, FLAG_EN_PASSANT, FLAG_CASTLE = range(4)
+
+# Undo record move of make_null_move; a8 to a8 is never a real move
+NULL_MOVE = 0
+
+# Bit-sliced attack counters hold up to 2**ATTACK_PLANES - 1 attackers per square
+ATTACK_PLANES = 5
+
+# Game phase: the weight of each piece type on the board, MAX_PHASE with all pieces on
+PHASE_WEIGHTS = (0, 0, 1, 1, 2, 4, 0)
+MAX_PHASE = 24
+
+# Piece-square table used until an evaluator installs its own: every entry is zero
+ZERO_PSQ_TABLE = [[0] * 64 for _ in range(15)]
+
+_HALF = 1 << 31
+_LOW = (1 << 32) - 1
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+# Castling rights kept after a move that touches the square
+CASTLING_MASK = [15] * 64
+CASTLING_MASK[0] &= ~CASTLE_BQ
+CASTLING_MASK[7] &= ~CASTLE_BK
+CASTLING_MASK[4] &= ~(CASTLE_BK | CASTLE_BQ)
+CASTLING_MASK[56] &= ~CASTLE_WQ
+CASTLING_MASK[63] &= ~CASTLE_WK
+CASTLING_MASK[60] &= ~(CASTLE_WK | CASTLE_WQ)
+
+# King destination -> (rook from, rook to)
+CASTLING_ROOK = {62: (63, 61), 58: (56, 59), 6: (7, 5), 2: (0, 3)}
+
+
+def make_piece(side, piece_type):
+    """Piece code: bit 3 is the side, the low 3 bits the type"""
+    return (side << 3) | piece_type
+
+
+def square(x, y):
+    return y * 8 + x
+
+
+def square_name(sq):
+    return f"{chr(97 + (sq & 7))}{8 - (sq >> 3)}"
+
+
+def parse_square(name):
+    return (8 - int(name[1])) * 8 + ord(name[0]) - 97
+
+
+def encode_move(frm, to, promo=EMPTY, flag=FLAG_NORMAL):
+    """Pack a move into an int: from | to << 6 | promo << 12 | flag << 15"""
+    return frm | (to << 6) | (promo << 12) | (flag << 15)
+
+
+def move_from(move):
+    return move & 63
+
+
+def move_to(move):
+    return (move >> 6) & 63
+
+
+def move_promo(move):
+    return (move >> 12) & 7
+
+
+def move_flag(move):
+    return move >> 15
+
+
+def pack_score(mg, eg):
+    """Middlegame and endgame values as one int; sums of packed scores stay packed,
+    so one piece-square table and one running sum serve both game phases"""
+    return (eg << 32) + mg
+
+
+def unpack_score(score):
+    """(mg, eg) of a packed score"""
+    mg = ((score + _HALF) & _LOW) - _HALF
+    return mg, (score - mg) >> 32
+
+
+def taper(score, phase):
+    """Blend a packed score by game phase: MAX_PHASE is all middlegame, 0 all endgame"""
+    mg, eg = unpack_score(score)
+    phase = min(phase, MAX_PHASE)
+    return (mg * phase + eg * (MAX_PHASE - phase)) / MAX_PHASE
+
+
+def move_to_uci(move):
+    """Move in long algebraic notation, e.g. e2e4 or e7e8q"""
+    text = square_name(move & 63) + square_name((move >> 6) & 63)
+    promo = (move >> 12) & 7
+    if promo:
+        text += PIECE_LETTERS[promo]
+    return text
+
+
+class Position:
+    # Key into MOVE_GENERATORS: 'mailbox' and 'bitboard' produce the same pseudo-legal
+    # moves, 'legal' only the strictly legal ones
+    move_generator = 'bitboard'
+
+    def __init__(self):
+        """Empty board, white to move, no castling rights"""
+        self.squares = [EMPTY] * 64
+        self.side = WHITE
+        self.castling = 0
+        self.ep = -1
+        self.halfmove = 0
+        self.fullmove = 1
+        self.king_sq = [-1, -1]
+        # One bitboard per piece code (bit n = square n) and one per side
+        self.bitboards = [0] * 15
+        self.occupied = [0, 0]
+        # Attack maps: attacks[sq] is the attack set of the piece on sq and attack_owner[sq]
+        # its side, attack_planes[side] the number of attackers of every square as bit-sliced
+        # counters (bit n of plane i is bit i of the count on square n), attacked[side] the union
+        self.attacks = [0] * 64
+        self.attack_owner = [0] * 64
+        self.attack_planes = [[0] * ATTACK_PLANES, [0] * ATTACK_PLANES]
+        self.attacked = [0, 0]
+        # Zobrist hashes of the whole position and of the pawns alone, kept up to date by
+        # make_move and set_piece (see zobrist.py for the keys)
+        self.hash = CASTLING_KEYS[0]
+        self.pawn_hash = 0
+        # Sum of psq_table[piece][sq] over the board and the game phase, kept up to date
+        # like the hashes so an evaluation does not have to look at every piece
+        self.psq_table = ZERO_PSQ_TABLE
+        self.psq = 0
+        self.phase = 0
+        # Undo records: (move, captured piece, castling, ep, halfmove, hash, pawn hash,
+        # squares whose attack sets the move recomputed, psq and phase before the move)
+        self.history = []
+
+    @classmethod
+    def from_fen(cls, fen=START_FEN):
+        """Create a position from a FEN string"""
+        position = cls()
+        fields = fen.split()
+        for y, row in enumerate(fields[0].split('/')):
+            x = 0
+            for char in row:
+                if char.isdigit():
+                    x += int(char)
+                    continue
+                side = WHITE if char.isupper() else BLACK
+                position.set_piece(square(x, y), make_piece(side, PIECE_LETTERS.index(char.lower())))
+                x += 1
+        position.side = WHITE if len(fields) < 2 or fields[1] == 'w' else BLACK
+        rights = fields[2] if len(fields) > 2 else '-'
+        position.castling = sum(flag for char, flag in zip('KQkq', (CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ))
+                                if char in rights)
+        position.ep = parse_square(fields[3]) if len(fields) > 3 and fields[3] != '-' else -1
+        position.halfmove = int(fields[4]) if len(fields) > 4 else 0
+        position.fullmove = int(fields[5]) if len(fields) > 5 else 1
+        position.rehash()
+        return position
+
+    def fen(self):
+        """Return the FEN string of the position"""
+        rows = []
+        for y in range(8):
+            row, empty = '', 0
+            for x in range(8):
+                piece = self.squares[square(x, y)]
+                if piece == EMPTY:
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                letter = PIECE_LETTERS[piece & 7]
+                row += letter.upper() if piece >> 3 == WHITE else letter
+            rows.append(row + (str(empty) if empty else ''))
+        rights = ''.join(char for char, flag in zip('KQkq', (CASTLE_WK, CASTLE_WQ, CASTLE_BK, CASTLE_BQ))
+                         if self.castling & flag) or '-'
+        ep = square_name(self.ep) if self.ep >= 0 else '-'
+        side = 'w' if self.side == WHITE else 'b'
+        return f"{'/'.join(rows)} {side} {rights} {ep} {self.halfmove} {self.fullmove}"
+
+    def copy(self):
+        """Independent copy of the position"""
+        position = Position.__new__(Position)
+        position.squares = self.squares[:]
+        position.side = self.side
+        position.castling = self.castling
+        position.ep = self.ep
+        position.halfmove = self.halfmove
+        position.fullmove = self.fullmove
+        position.king_sq = self.king_sq[:]
+        position.bitboards = self.bitboards[:]
+        position.occupied = self.occupied[:]
+        position.attacks = self.attacks[:]
+        position.attack_owner = self.attack_owner[:]
+        position.attack_planes = [self.attack_planes[0][:], self.attack_planes[1][:]]
+        position.attacked = self.attacked[:]
+        position.hash = self.hash
+        position.pawn_hash = self.pawn_hash
+        position.psq_table = self.psq_table
+        position.psq = self.psq
+        position.phase = self.phase
+        position.history = self.history[:]
+        position.move_generator = self.move_generator
+        return position
+
+    def snapshot(self):
+        """Copy to hand to a search: only the undo records repetition detection can reach are kept"""
+        position = self.copy()
+        position.history = self.history[max(len(self.history) - self.halfmove, 0):]
+        return position
+
+    def piece_at(self, x, y):
+        return self.squares[y * 8 + x]
+
+    # === Board editing ===
+    def set_piece(self, sq, piece):
+        """Put a piece code (or EMPTY) on a square outside of normal play"""
+        old = self.squares[sq]
+        if old != EMPTY:
+            self._remove(sq)
+            if (old & 7) == KING and self.king_sq[old >> 3] == sq:
+                self.king_sq[old >> 3] = -1
+            self.hash ^= PIECE_KEYS[old][sq] ^ CASTLING_KEYS[self.castling]
+            self.psq -= self.psq_table[old][sq]
+            self.phase -= PHASE_WEIGHTS[old & 7]
+            if (old & 7) == PAWN:
+                self.pawn_hash ^= PIECE_KEYS[old][sq]
+            self.castling &= CASTLING_MASK[sq]
+            self.hash ^= CASTLING_KEYS[self.castling]
+        if piece != EMPTY:
+            self._put(sq, piece)
+            if (piece & 7) == KING:
+                self.king_sq[piece >> 3] = sq
+            self.hash ^= PIECE_KEYS[piece][sq]
+            self.psq += self.psq_table[piece][sq]
+            self.phase += PHASE_WEIGHTS[piece & 7]
+            if (piece & 7) == PAWN:
+                self.pawn_hash ^= PIECE_KEYS[piece][sq]
+        self._refresh_attacks(1 << sq)
+
+    def infer_castling_rights(self):
+        """Grant castling rights for every king and rook still on its home square"""
+        rights = 0
+        squares = self.squares
+        if squares[60] == make_piece(WHITE, KING):
+            if squares[63] == make_piece(WHITE, ROOK):
+                rights |= CASTLE_WK
+            if squares[56] == make_piece(WHITE, ROOK):
+                rights |= CASTLE_WQ
+        if squares[4] == make_piece(BLACK, KING):
+            if squares[7] == make_piece(BLACK, ROOK):
+                rights |= CASTLE_BK
+            if squares[0] == make_piece(BLACK, ROOK):
+                rights |= CASTLE_BQ
+        self.castling = rights
+        self.rehash()
+
+    def rehash(self):
+        """Rebuild both hashes from scratch, needed after side, castling or ep are set directly"""
+        self.hash = compute_hash(self)
+        self.pawn_hash = compute_pawn_hash(self)
+
+    def set_psq_table(self, table):
+        """Install a piece-square table, table[piece][sq], and sum it over the board.
+        Undo records already made keep sums of the previous table, so install it at the root"""
+        self.psq_table = table
+        self.psq = sum(table[piece][sq] for sq, piece in enumerate(self.squares) if piece != EMPTY)
+
+    def _put(self, sq, piece):
+        self.squares[sq] = piece
+        self.bitboards[piece] |= 1 << sq
+        self.occupied[piece >> 3] |= 1 << sq
+
+    def _remove(self, sq):
+        piece = self.squares[sq]
+        self.squares[sq] = EMPTY
+        self.bitboards[piece] ^= 1 << sq
+        self.occupied[piece >> 3] ^= 1 << sq
+
+    def _shift(self, frm, to):
+        piece = self.squares[frm]
+        self.squares[to] = piece
+        self.squares[frm] = EMPTY
+        mask = (1 << frm) | (1 << to)
+        self.bitboards[piece] ^= mask
+        self.occupied[piece >> 3] ^= mask
+
+    def _refresh_attacks(self, changed):
+        """Bring the attack maps up to date after the squares in `changed` were edited.
+        Apart from the pieces on those squares only sliders that saw one of them are affected;
+        returns every square whose attack set was recomputed."""
+        bitboards = self.bitboards
+        occupied = self.occupied[0] | self.occupied[1]
+        stale = changed
+        # A slider is affected only if it sees the changed square nearest to it on its ray,
+        # and whether it sees that square does not depend on the change itself
+        rooks = (bitboards[4] | bitboards[5] | bitboards[12] | bitboards[13]) & ~changed
+        bishops = (bitboards[3] | bitboards[5] | bitboards[11] | bitboards[13]) & ~changed
+        lines = changed
+        while lines:
+            low = lines & -lines
+            lines ^= low
+            sq = low.bit_length() - 1
+            if rooks:
+                stale |= (RANK_ATTACKS[sq][occupied & RANK_MASK[sq]]
+                          | FILE_ATTACKS[sq][occupied & FILE_MASK[sq]]) & rooks
+            if bishops:
+                stale |= (DIAGONAL_ATTACKS[sq][occupied & DIAGONAL_MASK[sq]]
+                          | ANTI_DIAGONAL_ATTACKS[sq][occupied & ANTI_DIAGONAL_MASK[sq]]) & bishops
+        self._update_attacks(stale)
+        return stale
+
+    def _update_attacks(self, stale):
+        """Recompute the attack sets of the pieces on the squares in `stale` and fix the counters"""
+        squares = self.squares
+        attacks = self.attacks
+        owners = self.attack_owner
+        occupied = self.occupied[0] | self.occupied[1]
+        touched = 0
+        while stale:
+            low = stale & -stale
+            stale ^= low
+            sq = low.bit_length() - 1
+            piece = squares[sq]
+            old = attacks[sq]
+            old_side = owners[sq]
+            piece_type = piece & 7
+            if piece_type == EMPTY:
+                new = 0
+            elif piece_type == PAWN:
+                new = PAWN_ATTACKS[piece >> 3][sq]
+            elif piece_type == KNIGHT:
+                new = KNIGHT_ATTACKS[sq]
+            elif piece_type == KING:
+                new = KING_ATTACKS[sq]
+            else:
+                new = 0
+                if piece_type != BISHOP:
+                    new = (RANK_ATTACKS[sq][occupied & RANK_MASK[sq]]
+                           | FILE_ATTACKS[sq][occupied & FILE_MASK[sq]])
+                if piece_type != ROOK:
+                    new |= (DIAGONAL_ATTACKS[sq][occupied & DIAGONAL_MASK[sq]]
+                            | ANTI_DIAGONAL_ATTACKS[sq][occupied & ANTI_DIAGONAL_MASK[sq]])
+            new_side = piece >> 3
+            if old == new and (old_side == new_side or not old):
+                continue
+            attacks[sq] = new
+            owners[sq] = new_side
+            if old:
+                # Ripple-borrow the old attack set out of the bit-sliced counters
+                planes = self.attack_planes[old_side]
+                borrow = old
+                for i in range(ATTACK_PLANES):
+                    plane = planes[i]
+                    planes[i] = plane ^ borrow
+                    borrow &= ~plane
+                    if not borrow:
+                        break
+                touched |= 1 << old_side
+            if new:
+                # Ripple-carry the new one in
+                planes = self.attack_planes[new_side]
+                carry = new
+                for i in range(ATTACK_PLANES):
+                    plane = planes[i]
+                    planes[i] = plane ^ carry
+                    carry &= plane
+                    if not carry:
+                        break
+                touched |= 1 << new_side
+        if touched & 1:
+            planes = self.attack_planes[WHITE]
+            self.attacked[WHITE] = planes[0] | planes[1] | planes[2] | planes[3] | planes[4]
+        if touched & 2:
+            planes = self.attack_planes[BLACK]
+            self.attacked[BLACK] = planes[0] | planes[1] | planes[2] | planes[3] | planes[4]
+
+    # === Moves ===
+    def make_move(self, move):
+        """Play a move generated for this position and push its undo record"""
+        frm = move & 63
+        to = (move >> 6) & 63
+        promo = (move >> 12) & 7
+        flag = move >> 15
+        squares = self.squares
+        side = self.side
+        piece = squares[frm]
+        captured = make_piece(side ^ 1, PAWN) if flag == FLAG_EN_PASSANT else squares[to]
+        changed = (1 << frm) | (1 << to)
+        phase = self.phase
+        keys = PIECE_KEYS
+        table = self.psq_table
+        psq = self.psq
+        key = self.hash ^ SIDE_KEY ^ CASTLING_KEYS[self.castling]
+        if self.ep >= 0:
+            key ^= EP_KEYS[self.ep & 7]
+        pawn_key = self.pawn_hash
+        if flag == FLAG_EN_PASSANT:
+            victim = to + 8 if side == WHITE else to - 8
+            self._remove(victim)
+            changed |= 1 << victim
+            key ^= keys[captured][victim]
+            pawn_key ^= keys[captured][victim]
+            psq -= table[captured][victim]
+        elif captured != EMPTY:
+            self._remove(to)
+            key ^= keys[captured][to]
+            psq -= table[captured][to]
+            self.phase -= PHASE_WEIGHTS[captured & 7]
+            if (captured & 7) == PAWN:
+                pawn_key ^= keys[captured][to]
+            elif (captured & 7) == KING:
+                self.king_sq[side ^ 1] = -1
+        if promo:
+            self._remove(frm)
+            self._put(to, make_piece(side, promo))
+            key ^= keys[piece][frm] ^ keys[make_piece(side, promo)][to]
+            pawn_key ^= keys[piece][frm]
+            psq += table[make_piece(side, promo)][to] - table[piece][frm]
+            self.phase += PHASE_WEIGHTS[promo]
+        else:
+            self._shift(frm, to)
+            key ^= keys[piece][frm] ^ keys[piece][to]
+            psq += table[piece][to] - table[piece][frm]
+            if (piece & 7) == PAWN:
+                pawn_key ^= keys[piece][frm] ^ keys[piece][to]
+        if flag == FLAG_CASTLE:
+            rook_from, rook_to = CASTLING_ROOK[to]
+            self._shift(rook_from, rook_to)
+            changed |= (1 << rook_from) | (1 << rook_to)
+            rook = make_piece(side, ROOK)
+            key ^= keys[rook][rook_from] ^ keys[rook][rook_to]
+            psq += table[rook][rook_to] - table[rook][rook_from]
+        if (piece & 7) == KING:
+            self.king_sq[side] = to
+        # The same squares are stale again once the move is taken back, so they are the
+        # whole attack map part of the undo record
+        stale = self._refresh_attacks(changed)
+        self.history.append((move, captured, self.castling, self.ep, self.halfmove,
+                             self.hash, self.pawn_hash, stale, self.psq, phase))
+        self.psq = psq
+
+        self.castling &= CASTLING_MASK[frm] & CASTLING_MASK[to]
+        self.ep = (frm + to) >> 1 if flag == FLAG_DOUBLE else -1
+        key ^= CASTLING_KEYS[self.castling]
+        if self.ep >= 0:
+            key ^= EP_KEYS[self.ep & 7]
+        self.hash = key
+        self.pawn_hash = pawn_key
+        self.halfmove = 0 if captured or (piece & 7) == PAWN else self.halfmove + 1
+        if side == BLACK:
+            self.fullmove += 1
+        self.side = side ^ 1
+
+    def make_null_move(self):
+        """Pass the turn, for null-move pruning; taken back with unmake_move like any move.
+        The halfmove clock restarts so no repetition is claimed across the pass."""
+        self.history.append((NULL_MOVE, EMPTY, self.castling, self.ep, self.halfmove,
+                             self.hash, self.pawn_hash, 0, self.psq, self.phase))
+        key = self.hash ^ SIDE_KEY
+        if self.ep >= 0:
+            key ^= EP_KEYS[self.ep & 7]
+            self.ep = -1
+        self.hash = key
+        self.halfmove = 0
+        self.side ^= 1
+
+    def unmake_move(self):
+        """Take back the last move played with make_move (or make_null_move)"""
+        (move, captured, self.castling, self.ep, self.halfmove,
+         self.hash, self.pawn_hash, stale, self.psq, self.phase) = self.history.pop()
+        if move == NULL_MOVE:
+            self.side ^= 1
+            return
+        frm = move & 63
+        to = (move >> 6) & 63
+        flag = move >> 15
+        side = self.side ^ 1
+        self.side = side
+        if side == BLACK:
+            self.fullmove -= 1
+
+        if (move >> 12) & 7:
+            self._remove(to)
+            self._put(frm, make_piece(side, PAWN))
+        else:
+            self._shift(to, frm)
+            if (self.squares[frm] & 7) == KING:
+                self.king_sq[side] = frm
+        if flag == FLAG_CASTLE:
+            rook_from, rook_to = CASTLING_ROOK[to]
+            self._shift(rook_to, rook_from)
+        if captured != EMPTY:
+            if flag == FLAG_EN_PASSANT:
+                self._put(to + 8 if side == WHITE else to - 8, captured)
+            else:
+                self._put(to, captured)
+                if (captured & 7) == KING:
+                    self.king_sq[side ^ 1] = to
+        self._update_attacks(stale)
+
+    def is_repetition(self):
+        """Whether the position already occurred since the last capture or pawn move"""
+        history = self.history
+        key = self.hash
+        # Undo records hold the hash before their move; only every other one has the same side to move
+        for index in range(len(history) - 4, len(history) - self.halfmove - 1, -2):
+            if index < 0:
+                break
+            if history[index][5] == key:
+                return True
+        return False
+
+    def captured_piece(self, move):
+        """Piece code taken by a move, EMPTY for quiet moves"""
+        if move >> 15 == FLAG_EN_PASSANT:
+            return make_piece(self.side ^ 1, PAWN)
+        return self.squares[(move >> 6) & 63]
+
+    def generate_moves(self):
+        """Pseudo-legal moves for the side to move"""
+        return MOVE_GENERATORS[self.move_generator](self)
+
+    def is_square_attacked(self, sq, by_side):
+        """O(1) lookup in the attack maps"""
+        return (self.attacked[by_side] >> sq) & 1 == 1
+
+    def attackers_count(self, sq, by_side):
+        """Number of pieces of by_side attacking the square"""
+        planes = self.attack_planes[by_side]
+        return sum(((planes[i] >> sq) & 1) << i for i in range(ATTACK_PLANES))
+
+    def in_check(self, side=None):
+        """Whether the king of the given side (default: side to move) is attacked"""
+        side = self.side if side is None else side
+        king_sq = self.king_sq[side]
+        return king_sq >= 0 and (self.attacked[side ^ 1] >> king_sq) & 1 == 1
+
+    def is_legal(self, move):
+        """A pseudo-legal move is legal when it does not leave the own king attacked"""
+        self.make_move(move)
+        legal = not self.in_check(self.side ^ 1)
+        self.unmake_move()
+        return legal
+
+    def legal_moves(self):
+        """Strictly legal moves: pins and check evasions resolved during generation"""
+        return generate_legal_moves(self)
+
+    def is_checkmate(self):
+        return self.in_check() and not generate_legal_moves(self)
+
+    def is_stalemate(self):
+        return not self.in_check() and not generate_legal_moves(self)
+
+    def find_move(self, frm, to, promo=QUEEN):
+        """Match a from/to square pair against the legal moves"""
+        for move in generate_legal_moves(self):
+            if move & 63 == frm and (move >> 6) & 63 == to:
+                if not (move >> 12) & 7 or (move >> 12) & 7 == promo:
+                    return move
+        return None
+
+
+# The generators need the constants above
+from .movegen import generate_moves as generate_mailbox_moves  # noqa: E402
+from .zobrist import (  # noqa: E402
+    PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, EP_KEYS, compute_hash, compute_pawn_hash,
+)
+from .bitboard import (  # noqa: E402
+    generate_moves as generate_bitboard_moves, generate_legal_moves, PAWN_ATTACKS, KNIGHT_ATTACKS, KING_ATTACKS,
+    RANK_MASK, RANK_ATTACKS, FILE_MASK, FILE_ATTACKS,
+    DIAGONAL_MASK, DIAGONAL_ATTACKS, ANTI_DIAGONAL_MASK, ANTI_DIAGONAL_ATTACKS,
+)
+
+MOVE_GENERATORS = {
+    'mailbox': generate_mailbox_moves,
+    'bitboard': generate_bitboard_moves,
+    'legal': generate_legal_moves,
+}
@@ -0,0 +1,369 @@
+"""
+Negamax alpha-beta search with iterative deepening.
+
+Scores are always from the point of view of the side to move. The search
+deepens one ply at a time and, when the time budget runs out in the middle of
+an iteration, falls back to the best move found so far. Leaves are resolved by
+a quiescence search over the captures that do not lose material.
+
+Each iteration after the first starts with an aspiration window around the
+previous score, widened and searched again whenever the score falls outside
+it. The principal variation is collected in a triangular table, kept in
+principal_variation after every completed iteration and followed first by the
+next one. stats() describes the last search: node counts, table use, how
+often the first move already cut off and what every iteration cost.
+
+Two selective techniques, each of which can be switched off, spend less time
+proving that bad moves are bad: null-move pruning (if passing the turn still
+fails high, a real move will too; not tried without pieces besides pawns,
+where passing may be the only thing that does not lose) and late-move
+reductions (quiet moves ordered late are searched shallower first and only
+searched to full depth again if they beat alpha).
+"""
+import time
+
+from .ordering import MoveOrderer, MAX_PLY
+from .position import PAWN, KING, QUEEN, make_piece, move_to_uci
+from .see import see
+from .tt import BOUND_EXACT, BOUND_LOWER, BOUND_UPPER
+
+INFINITY = 1000000
+MATE = 100000
+# Nodes between two looks at the clock
+CHECK_EVERY = 16
+# Null-move pruning: depth reduction of the null-move search, and the depth it starts at
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_DEPTH = 3
+# Late-move reductions: quiet moves after the first LMR_MOVES of a node at least
+# LMR_DEPTH deep lose one ply, two after LMR_LATE_MOVES
+LMR_DEPTH = 3
+LMR_MOVES = 3
+LMR_LATE_MOVES = 8
+# Aspiration window: half width around the previous score, multiplied by
+# ASPIRATION_GROWTH every time the score falls outside
+ASPIRATION_WINDOW = 50
+ASPIRATION_GROWTH = 4
+
+
+def format_stats(stats):
+    """A Search.stats() dict as short lines of text, for the log and the side panel;
+    the table's own stats() are added when the dict carries them under 'tt'"""
+    lines = [
+        f"depth {stats['depth']}/{stats['seldepth']}  score {stats['score']}",
+        f"nodes {stats['nodes']} (q {stats['qnodes']})  {stats['nps']} nps",
+        f"tt hits {stats['tt_hits']}/{stats['tt_probes']}  replaced {stats['tt_replacements']}",
+        f"first move cut-offs {stats['first_move_cutoff_rate']:.0%}  branching {stats['branching_factor']:.1f}",
+        "iterations " + ' '.join(f"{seconds * 1000:.0f}" for seconds in stats['iteration_times']) + " ms",
+        "pv " + ' '.join(stats['pv']),
+    ]
+    if 'tt' in stats:
+        table = stats['tt']
+        lines.append(f"tt fill {table['fill']:.1%} of {table['entries']} entries  "
+                     f"hit rate {table['hit_rate']:.0%}")
+    return lines
+
+
+class SearchTimeout(Exception):
+    """Raised inside the tree when the time budget is spent or the search is cancelled"""
+
+
+class Search:
+    def __init__(self, evaluate, tt=None, psq_table=None, null_move=True, lmr=True):
+        """evaluate(position) scores a position for the side to move, tt is an
+        optional TranspositionTable kept from one search to the next and psq_table
+        the piece-square table evaluate reads from position.psq, installed on
+        every position searched. null_move and lmr switch null-move pruning and
+        late-move reductions."""
+        self.evaluate = evaluate
+        self.tt = tt
+        self.psq_table = psq_table
+        self.null_move = null_move
+        self.lmr = lmr
+        self.orderer = MoveOrderer()
+        # Triangular PV table: pv[ply][ply:pv_length[ply]] is the best line found from ply on
+        self.pv = [[0] * (MAX_PLY + 1) for _ in range(MAX_PLY + 1)]
+        self.pv_length = [0] * (MAX_PLY + 1)
+        # Moves of the last completed iteration's principal variation, root move first
+        self.principal_variation = []
+        self.nodes = 0
+        # Statistics of the last search, see stats()
+        self.qnodes = 0
+        self.seldepth = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        # (depth, score, nodes, seconds) of every completed iteration
+        self.iterations = []
+        self.elapsed = 0.0
+        self._tt_counts = (0, 0, 0)
+        self.deadline = None
+        self.cancel = None
+        self.best_move = None
+        self.best_score = -INFINITY
+        self.completed_depth = 0
+
+    def search(self, position, max_depth=MAX_PLY, time_limit=None, root_moves=None,
+               deadline=None, cancel=None, start_depth=1):
+        """Best move for the side to move, None when there is no legal move.
+
+        The search stops at whichever comes first of time_limit seconds from now,
+        the absolute time.perf_counter() deadline, or cancel (anything with an
+        is_set() method, e.g. a threading.Event) being set, and returns the best
+        move found until then. root_moves restricts the moves considered at the
+        root and start_depth skips the first iterations. The position is handed
+        back unchanged in every case."""
+        start = time.perf_counter()
+        self.nodes = 0
+        self.qnodes = 0
+        self.seldepth = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.iterations = []
+        self.elapsed = 0.0
+        if self.tt is not None:
+            self._tt_counts = (self.tt.probes, self.tt.hits, self.tt.replacements)
+        if time_limit is not None:
+            limit = start + time_limit
+            deadline = limit if deadline is None else min(deadline, limit)
+        self.deadline = deadline
+        self.cancel = cancel
+        self.best_move = None
+        self.best_score = -INFINITY
+        self.completed_depth = 0
+        self.principal_variation = []
+        self.orderer.clear()
+        if self.psq_table is not None and position.psq_table is not self.psq_table:
+            position.set_psq_table(self.psq_table)
+        moves = list(root_moves) if root_moves is not None else position.legal_moves()
+        if not moves:
+            return None
+        tt_move = 0
+        if self.tt is not None:
+            self.tt.new_search()
+            entry = self.tt.probe(position.hash)
+            if entry is not None:
+                tt_move = entry[0]
+        self.orderer.order(position, moves, 0, tt_move)
+        self.best_move = moves[0]
+        root_length = len(position.history)
+        try:
+            for depth in range(min(start_depth, max_depth), max_depth + 1):
+                iteration_start, iteration_nodes = time.perf_counter(), self.nodes
+                alpha, beta = -INFINITY, INFINITY
+                delta = ASPIRATION_WINDOW
+                if self.completed_depth:
+                    alpha, beta = self.best_score - delta, self.best_score + delta
+                while True:
+                    score = self._search_root(position, moves, depth, alpha, beta)
+                    moves.remove(self.best_move)
+                    moves.insert(0, self.best_move)
+                    if alpha < score < beta:
+                        break
+                    delta *= ASPIRATION_GROWTH
+                    if score <= alpha:
+                        alpha = max(score - delta, -INFINITY)
+                    else:
+                        beta = min(score + delta, INFINITY)
+                self.completed_depth = depth
+                self.principal_variation = self.pv[0][:self.pv_length[0]]
+                self.iterations.append((depth, self.best_score, self.nodes - iteration_nodes,
+                                        time.perf_counter() - iteration_start))
+                if abs(self.best_score) >= MATE - MAX_PLY:
+                    break
+        except SearchTimeout:
+            while len(position.history) > root_length:
+                position.unmake_move()
+        self.elapsed = time.perf_counter() - start
+        return self.best_move
+
+    def stats(self):
+        """Statistics of the last search as a dict, e.g. for logging"""
+        probes = hits = replacements = 0
+        if self.tt is not None:
+            start_probes, start_hits, start_replacements = self._tt_counts
+            probes = self.tt.probes - start_probes
+            hits = self.tt.hits - start_hits
+            # Stores that evicted another position's entry
+            replacements = self.tt.replacements - start_replacements
+        iteration_nodes = [nodes for _, _, nodes, _ in self.iterations]
+        return {
+            'nodes': self.nodes,
+            'qnodes': self.qnodes,
+            'nps': int(self.nodes / self.elapsed) if self.elapsed else 0,
+            'time': self.elapsed,
+            'depth': self.completed_depth,
+            'seldepth': self.seldepth,
+            'score': self.best_score,
+            'pv': [move_to_uci(move) for move in self.principal_variation],
+            'tt_probes': probes,
+            'tt_hits': hits,
+            'tt_hit_rate': hits / probes if probes else 0.0,
+            'tt_replacements': replacements,
+            'cutoffs': self.cutoffs,
+            'first_move_cutoff_rate': self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+            # Nodes of the last completed iteration over those of the one before
+            'branching_factor': (iteration_nodes[-1] / iteration_nodes[-2]
+                                 if len(iteration_nodes) > 1 and iteration_nodes[-2] else 0.0),
+            'iteration_times': [seconds for _, _, _, seconds in self.iterations],
+        }
+
+    def _search_root(self, position, moves, depth, alpha, beta):
+        """Search the root moves inside the window: returns the best score, alpha
+        itself when every move fails low and at least beta on a fail high"""
+        original_alpha = alpha
+        pv_move = self.principal_variation[0] if self.principal_variation else 0
+        self.pv_length[0] = 0
+        for move in moves:
+            position.make_move(move)
+            score = -self._negamax(position, depth - 1, -beta, -alpha, 1, True, move == pv_move)
+            position.unmake_move()
+            if score > alpha:
+                # The previous best is searched first, so anything beating it
+                # is safe to play even if this iteration never finishes
+                alpha = score
+                self.best_move, self.best_score = move, score
+                self._update_pv(0, move)
+                if score >= beta:
+                    break
+        if self.tt is not None and alpha > original_alpha:
+            self.tt.store(position.hash, self.best_move, alpha, depth,
+                          BOUND_LOWER if alpha >= beta else BOUND_EXACT)
+        return alpha
+
+    def _update_pv(self, ply, move):
+        """The line from ply is now move followed by the line found after it"""
+        row = self.pv[ply]
+        row[ply] = move
+        end = self.pv_length[ply + 1]
+        row[ply + 1:end] = self.pv[ply + 1][ply + 1:end]
+        self.pv_length[ply] = end
+
+    def _tick(self, ply):
+        """Count a node and look at the clock and the cancel token every CHECK_EVERY of them"""
+        self.nodes += 1
+        if ply > self.seldepth:
+            self.seldepth = ply
+        if not self.nodes % CHECK_EVERY:
+            if self.deadline is not None and time.perf_counter() >= self.deadline:
+                raise SearchTimeout()
+            if self.cancel is not None and self.cancel.is_set():
+                raise SearchTimeout()
+
+    def _negamax(self, position, depth, alpha, beta, ply, null_allowed=True, on_pv=False):
+        """on_pv: every move leading here is on the previous iteration's principal variation"""
+        self.pv_length[ply] = ply
+        if depth <= 0:
+            return self._quiesce(position, alpha, beta, ply)
+        self._tick(ply)
+        if position.is_repetition():
+            return 0
+        tt = self.tt
+        tt_move = 0
+        if tt is not None:
+            key = position.hash
+            entry = tt.probe(key, ply)
+            if entry is not None:
+                tt_move, tt_score, tt_depth, bound = entry
+                if tt_depth >= depth and (bound == BOUND_EXACT
+                                          or (bound == BOUND_LOWER and tt_score >= beta)
+                                          or (bound == BOUND_UPPER and tt_score <= alpha)):
+                    return tt_score
+        moves = position.legal_moves()
+        if not moves:
+            return -MATE + ply if position.in_check() else 0
+        if position.halfmove >= 100:
+            return 0
+        if ply >= MAX_PLY:
+            return self.evaluate(position)
+        in_check = position.in_check()
+        if (self.null_move and null_allowed and depth >= NULL_MOVE_DEPTH and not in_check
+                and abs(beta) < MATE - MAX_PLY and self._has_pieces(position)
+                and self.evaluate(position) >= beta):
+            position.make_null_move()
+            score = -self._negamax(position, depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + 1,
+                                   ply + 1, False)
+            position.unmake_move()
+            if score >= beta:
+                # A mate found after passing is not a mate the side to move can claim
+                return beta if score >= MATE - MAX_PLY else score
+        pv_move = 0
+        if on_pv and ply < len(self.principal_variation):
+            # The previous iteration's line goes first even if the table lost its entry
+            pv_move = self.principal_variation[ply]
+            if pv_move in moves:
+                tt_move = pv_move
+        orderer = self.orderer
+        orderer.order(position, moves, ply, tt_move)
+        reduce = self.lmr and depth >= LMR_DEPTH and not in_check
+        original_alpha = alpha
+        best_move = 0
+        for index, move in enumerate(moves):
+            reduction = 0
+            if reduce and index >= LMR_MOVES and orderer.is_quiet(position, move):
+                reduction = 1 if index < LMR_LATE_MOVES else 2
+            position.make_move(move)
+            if reduction and not position.in_check():
+                # Zero window: all it has to show is that the move does not beat alpha
+                score = -self._negamax(position, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1)
+                if score > alpha:
+                    score = -self._negamax(position, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                score = -self._negamax(position, depth - 1, -beta, -alpha, ply + 1, True,
+                                       on_pv and move == pv_move)
+            position.unmake_move()
+            if score >= beta:
+                self.cutoffs += 1
+                if not index:
+                    self.first_move_cutoffs += 1
+                if orderer.is_quiet(position, move):
+                    orderer.update(position, move, ply, depth)
+                if tt is not None:
+                    tt.store(key, move, score, depth, BOUND_LOWER, ply)
+                return score
+            if score > alpha:
+                alpha = score
+                best_move = move
+                self._update_pv(ply, move)
+        if tt is not None:
+            tt.store(key, best_move, alpha, depth,
+                     BOUND_EXACT if alpha > original_alpha else BOUND_UPPER, ply)
+        return alpha
+
+    @staticmethod
+    def _has_pieces(position):
+        """Whether the side to move has anything besides pawns and its king"""
+        side = position.side
+        return bool(position.occupied[side] & ~(position.bitboards[make_piece(side, PAWN)]
+                                                | position.bitboards[make_piece(side, KING)]))
+
+    def _quiesce(self, position, alpha, beta, ply):
+        """Search captures and queen promotions only, until the position is quiet.
+        Out of check the side to move may also stand pat on the static evaluation."""
+        self._tick(ply)
+        self.qnodes += 1
+        in_check = position.in_check()
+        moves = position.legal_moves()
+        if not moves:
+            return -MATE + ply if in_check else 0
+        if ply >= MAX_PLY:
+            return self.evaluate(position)
+        orderer = self.orderer
+        if not in_check:
+            stand_pat = self.evaluate(position)
+            if stand_pat >= beta:
+                return stand_pat
+            if stand_pat > alpha:
+                alpha = stand_pat
+            # Captures that lose material once the exchange is played out are not worth a node
+            moves = [move for move in moves
+                     if not orderer.is_quiet(position, move) and (move >> 12) & 7 in (0, QUEEN)
+                     and see(position, move) >= 0]
+        orderer.order(position, moves, ply)
+        for move in moves:
+            position.make_move(move)
+            score = -self._quiesce(position, -beta, -alpha, ply + 1)
+            position.unmake_move()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
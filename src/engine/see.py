@@ -0,0 +1,58 @@
+"""
+Static exchange evaluation: the material balance of a capture once every
+recapture on the target square has been played out, least valuable attacker
+first, without searching anything else.
+"""
+from .position import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, FLAG_EN_PASSANT, WHITE
+from .bitboard import attackers_to
+
+SEE_VALUES = [0, 100, 320, 330, 500, 900, 20000]
+
+
+def see(position, move):
+    """Expected material gain of a capture or promotion for the side to move"""
+    squares = position.squares
+    bitboards = position.bitboards
+    frm = move & 63
+    to = (move >> 6) & 63
+    promo = (move >> 12) & 7
+    occupied = position.occupied[0] | position.occupied[1]
+    if move >> 15 == FLAG_EN_PASSANT:
+        victim = PAWN
+        occupied ^= 1 << (to + 8 if position.side == WHITE else to - 8)
+    else:
+        victim = squares[to] & 7
+    gain = [0] * 32
+    gain[0] = SEE_VALUES[victim]
+    attacker = squares[frm] & 7
+    if promo:
+        gain[0] += SEE_VALUES[promo] - SEE_VALUES[PAWN]
+        attacker = promo
+    from_bit = 1 << frm
+    side = position.side ^ 1
+    depth = 0
+    while True:
+        depth += 1
+        # Score if the piece now standing on the square is taken in turn
+        gain[depth] = SEE_VALUES[attacker] - gain[depth - 1]
+        occupied ^= from_bit
+        # Recomputed with the new occupancy so sliders behind the last capturer join in
+        attackers = attackers_to(position, to, occupied, side) & occupied
+        if not attackers:
+            break
+        for attacker in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING):
+            pieces = attackers & bitboards[(side << 3) | attacker]
+            if pieces:
+                break
+        if attacker == KING and attackers_to(position, to, occupied, side ^ 1) & occupied:
+            # The king cannot recapture onto a defended square
+            break
+        from_bit = pieces & -pieces
+        side ^= 1
+        if depth == len(gain) - 1:
+            break
+    depth -= 1
+    while depth:
+        gain[depth - 1] = -max(-gain[depth - 1], gain[depth])
+        depth -= 1
+    return gain[0]
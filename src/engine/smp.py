@@ -0,0 +1,159 @@
+"""
+Lazy SMP: several processes search the same root and share one transposition
+table.
+
+The main search runs where it is called, helper processes search the same
+position with the root moves shuffled and every other helper starting one ply
+deeper, so they fill the shared table with entries the main search picks up
+instead of searching them itself. Only the main search's move is played; the
+helpers are stopped as soon as it returns.
+
+    python -m src.engine.smp                        # nodes/second with 1, 2, 4 and 8 workers
+    python -m src.engine.smp --workers 1 4 --time 5
+"""
+import argparse
+import multiprocessing
+import random
+import time
+
+from .position import Position, BLACK
+from .perft import REFERENCE_POSITIONS
+from .search import Search
+from .see import SEE_VALUES
+from .tt import SharedTranspositionTable
+from .worker import _PipeSignal
+
+
+def _help(conn, index, size_mb, name, factory, args, kwargs):
+    """Helper main loop: one 'done' reply per 'search' request"""
+    tt = SharedTranspositionTable(size_mb, name)
+    searcher = factory(tt, *args, **kwargs)
+    shuffle = random.Random(index).shuffle
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        command = message[0]
+        if command == 'search':
+            _, position, root_moves = message
+            moves = list(root_moves) if root_moves is not None else position.legal_moves()
+            shuffle(moves)
+            searcher.search(position, root_moves=moves, cancel=_PipeSignal(conn),
+                            start_depth=1 + index % 2)
+            conn.send(('done', searcher.nodes))
+        elif command == 'quit':
+            break
+        # A 'stop' that arrives after the search already finished needs no answer
+    tt.close()
+
+
+class LazySMP:
+    """Helper processes that search alongside a main Search through its shared table"""
+
+    def __init__(self, helpers, tt, factory, *args, **kwargs):
+        """factory(tt, *args, **kwargs) builds each helper's Search on the attached
+        SharedTranspositionTable tt, so it must be picklable"""
+        # spawn: never fork a process that has pygame and a window open
+        context = multiprocessing.get_context('spawn')
+        self.conns = []
+        self.processes = []
+        for index in range(1, helpers + 1):
+            conn, child_conn = context.Pipe()
+            process = context.Process(target=_help, daemon=True,
+                                      args=(child_conn, index, tt.size_mb, tt.name, factory, args, kwargs))
+            process.start()
+            self.conns.append(conn)
+            self.processes.append(process)
+        self.helper_nodes = 0
+
+    def search(self, searcher, position, **kwargs):
+        """searcher.search(position, **kwargs) with the helpers searching the same root until it returns"""
+        conns = []
+        for conn in self.conns:
+            try:
+                conn.send(('search', position, kwargs.get('root_moves')))
+                conns.append(conn)
+            except (EOFError, OSError):
+                pass
+        try:
+            return searcher.search(position, **kwargs)
+        finally:
+            self.helper_nodes = 0
+            for conn in conns:
+                try:
+                    conn.send(('stop',))
+                    self.helper_nodes += conn.recv()[1]
+                except (EOFError, OSError):
+                    pass
+
+    def close(self):
+        """Stop the helpers, killing those that do not quit on their own"""
+        for conn in self.conns:
+            try:
+                conn.send(('quit',))
+            except (EOFError, OSError):
+                pass
+        for process in self.processes:
+            process.join(1)
+            if process.is_alive():
+                process.terminate()
+
+
+def material(position):
+    """Material balance for the side to move, the benchmark's evaluation"""
+    score = 0
+    for piece_type in range(1, 6):
+        score += SEE_VALUES[piece_type] * (bin(position.bitboards[piece_type]).count('1')
+                                           - bin(position.bitboards[8 | piece_type]).count('1'))
+    return -score if position.side == BLACK else score
+
+
+def material_search(tt):
+    return Search(material, tt)
+
+
+def benchmark(workers, seconds, size_mb=16, report=print):
+    """Search each reference position for the given seconds, returns total nodes/second"""
+    tt = SharedTranspositionTable(size_mb)
+    smp = LazySMP(workers - 1, tt, material_search)
+    searcher = material_search(tt)
+    nodes = 0
+    elapsed = 0.0
+    depths = []
+    try:
+        for _, fen, _ in REFERENCE_POSITIONS:
+            tt.clear()
+            position = Position.from_fen(fen)
+            start = time.perf_counter()
+            smp.search(searcher, position, time_limit=seconds)
+            elapsed += time.perf_counter() - start
+            nodes += searcher.nodes + smp.helper_nodes
+            depths.append(searcher.completed_depth)
+    finally:
+        smp.close()
+        tt.close()
+    nps = nodes / max(elapsed, 1e-9)
+    report(f"{workers:>2} workers  {nodes:>9} nodes  {elapsed:6.2f}s  {int(nps):>8} nps  "
+           f"main depth {sum(depths) / len(depths):.1f}")
+    return nps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lazy SMP search throughput benchmark")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--time', type=float, default=2.0, help="seconds per position")
+    parser.add_argument('--hash', type=int, default=16, help="shared table size in MB")
+    args = parser.parse_args(argv)
+
+    print(f"{multiprocessing.cpu_count()} cores")
+    base = None
+    for workers in args.workers:
+        nps = benchmark(workers, args.time, args.hash)
+        base = base or nps
+        print(f"{'':>11}speedup x{nps / base:.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,170 @@
+"""
+Transposition table.
+
+Entries live in one flat array of unsigned 64-bit words, two words per entry
+(the key XOR the data, then the data) and two entries per bucket, so the memory
+used is fixed by the size given in MB. Within a bucket an entry from an older
+search is replaced first, then the shallower one.
+
+SharedTranspositionTable keeps the same words in a multiprocessing.shared_memory
+block so several search processes can fill one table. Writes take no lock: an
+entry torn by two processes writing at once no longer matches its key through
+the XOR and reads as a miss.
+"""
+from array import array
+from multiprocessing import shared_memory
+
+BOUND_EXACT = 1
+BOUND_LOWER = 2
+BOUND_UPPER = 3
+
+ENTRY_BYTES = 16
+BUCKET_ENTRIES = 2
+DEFAULT_SIZE_MB = 16
+
+# Mate scores are stored relative to the node, not the root
+MATE_BOUND = 100000 - 64
+
+_MOVE_MASK = (1 << 17) - 1
+_SCORE_OFFSET = 1 << 21
+_SCORE_MASK = (1 << 22) - 1
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=DEFAULT_SIZE_MB):
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        """Allocate the largest power-of-two number of buckets fitting in size_mb"""
+        buckets = 1
+        while buckets * 2 * BUCKET_ENTRIES * ENTRY_BYTES <= size_mb * 1024 * 1024:
+            buckets *= 2
+        self.size_mb = size_mb
+        self.bucket_mask = buckets - 1
+        self.table = self._allocate(buckets * BUCKET_ENTRIES * 2)
+        self.age = 0
+        self.reset_stats()
+
+    def _allocate(self, words):
+        return array('Q', bytes(words * 8))
+
+    def clear(self):
+        """Forget every entry, e.g. when a new game starts"""
+        self.table = self._allocate(len(self.table))
+        self.age = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def new_search(self):
+        """Age the entries of earlier searches so they are replaced first"""
+        self.age = (self.age + 1) & 0xFF
+
+    def probe(self, key, ply=0):
+        """(move, score, depth, bound) stored for the key, or None"""
+        self.probes += 1
+        table = self.table
+        index = (key & self.bucket_mask) * (BUCKET_ENTRIES * 2)
+        for slot in range(index, index + BUCKET_ENTRIES * 2, 2):
+            data = table[slot + 1]
+            if data and table[slot] ^ data == key:
+                self.hits += 1
+                score = ((data >> 17) & _SCORE_MASK) - _SCORE_OFFSET
+                if score > MATE_BOUND:
+                    score -= ply
+                elif score < -MATE_BOUND:
+                    score += ply
+                return data & _MOVE_MASK, score, (data >> 39) & 0xFF, (data >> 47) & 3
+        return None
+
+    def store(self, key, move, score, depth, bound, ply=0):
+        if score > MATE_BOUND:
+            score += ply
+        elif score < -MATE_BOUND:
+            score -= ply
+        table = self.table
+        age = self.age
+        index = (key & self.bucket_mask) * (BUCKET_ENTRIES * 2)
+        victim = None
+        victim_rank = None
+        for slot in range(index, index + BUCKET_ENTRIES * 2, 2):
+            data = table[slot + 1]
+            if data and table[slot] ^ data == key:
+                if not move:
+                    # Keep the best move of an earlier search of this position
+                    move = data & _MOVE_MASK
+                victim, victim_rank = slot, None
+                break
+            # Empty entries go first, then those of an older search, then the shallower
+            rank = (-1, 0) if not data else (((data >> 49) & 0xFF) == age, (data >> 39) & 0xFF)
+            if victim is None or rank < victim_rank:
+                victim, victim_rank = slot, rank
+        if victim_rank is not None and victim_rank[0] != -1:
+            self.replacements += 1
+        data = ((move & _MOVE_MASK) | ((int(score) + _SCORE_OFFSET) & _SCORE_MASK) << 17
+                | min(max(depth, 0), 0xFF) << 39 | bound << 47 | age << 49)
+        table[victim] = key ^ data
+        table[victim + 1] = data
+        self.stores += 1
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def fill(self, sample=1000):
+        """Share of used entries, estimated from the first buckets like UCI hashfull"""
+        slots = min(sample * BUCKET_ENTRIES, len(self.table) // 2)
+        used = sum(1 for slot in range(0, slots * 2, 2) if self.table[slot + 1])
+        return used / slots
+
+    def stats(self):
+        return {
+            'size_mb': self.size_mb,
+            'entries': len(self.table) // 2,
+            'probes': self.probes,
+            'hits': self.hits,
+            'hit_rate': self.hit_rate(),
+            'stores': self.stores,
+            'replacements': self.replacements,
+            'fill': self.fill(),
+        }
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """Transposition table in shared memory, filled by every process attached to it"""
+
+    def __init__(self, size_mb=DEFAULT_SIZE_MB, name=None):
+        """Creates a new block, or attaches to the block called name made with the same size_mb"""
+        self.shm = None
+        self.name = name
+        self.owner = name is None
+        super().__init__(size_mb)
+
+    def _allocate(self, words):
+        self.close()
+        if self.owner:
+            # New blocks come zero-filled
+            self.shm = shared_memory.SharedMemory(create=True, size=words * 8)
+        else:
+            self.shm = shared_memory.SharedMemory(name=self.name)
+        self.name = self.shm.name
+        return self.shm.buf[:words * 8].cast('Q')
+
+    def clear(self):
+        """Zero the block in place, so the attached processes see the cleared table"""
+        self.shm.buf[:len(self.table) * 8] = bytes(len(self.table) * 8)
+        self.age = 0
+        self.reset_stats()
+
+    def close(self):
+        """Detach from the block; the process that created it also frees it"""
+        if self.shm is None:
+            return
+        self.table.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+        self.shm = None
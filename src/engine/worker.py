@@ -0,0 +1,113 @@
+"""
+AI in a separate worker process.
+
+EngineProcess starts one process that builds the AI once and keeps it between
+moves, so its transposition table survives from one move to the next.
+Positions go to the worker and moves come back over a pipe; the search runs
+on its own core and never holds the GIL of the process drawing the game.
+"""
+import multiprocessing
+import time
+
+# Seconds between two looks at the cancel token while waiting for the worker
+POLL_INTERVAL = 0.01
+
+
+class _PipeSignal:
+    """Cancel token of the worker: set as soon as another message is waiting"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.stopped = False
+
+    def is_set(self):
+        if not self.stopped and self.conn.poll():
+            self.stopped = True
+        return self.stopped
+
+
+def _serve(conn, factory, args, kwargs):
+    """Worker main loop: one reply per 'move' or 'ponder' request, everything else is a command"""
+    ai = factory(*args, **kwargs)
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        command = message[0]
+        if command == 'move':
+            _, position, time_left = message
+            deadline = None if time_left is None else time.perf_counter() + time_left
+            move = ai.make_move(position, deadline=deadline, cancel=_PipeSignal(conn))
+            conn.send(('move', move, getattr(ai, 'search_stats', None)))
+        elif command == 'ponder':
+            conn.send(('ponder', ai.ponder(message[1], cancel=_PipeSignal(conn))))
+        elif command == 'new_game':
+            ai.new_game()
+        elif command == 'quit':
+            break
+        # A 'stop' that arrives after the search already finished needs no answer
+    ai.close()
+
+
+class EngineProcess:
+    """Drop-in stand-in for an AI object whose make_move runs in a worker process"""
+
+    def __init__(self, factory, *args, **kwargs):
+        """factory(*args, **kwargs) builds the AI inside the worker, so it must be picklable;
+        the AI's close() is called when the worker quits"""
+        # spawn: never fork a process that has pygame and a window open
+        context = multiprocessing.get_context('spawn')
+        self.conn, child_conn = context.Pipe()
+        # Not a daemon, so the AI may start processes of its own (Lazy SMP helpers);
+        # close() must be called, and the worker also quits when the pipe breaks
+        self.process = context.Process(target=_serve, args=(child_conn, factory, args, kwargs))
+        self.process.start()
+        # The worker AI's search_stats after the last make_move
+        self.search_stats = None
+
+    def make_move(self, position, deadline=None, cancel=None):
+        """Same contract as the AI's make_move; blocks the calling thread, not the GIL"""
+        time_left = None if deadline is None else max(deadline - time.perf_counter(), 0)
+        self.search_stats = None
+        try:
+            self.conn.send(('move', position, time_left))
+            while not self.conn.poll(POLL_INTERVAL):
+                if cancel is not None and cancel.is_set():
+                    self.conn.send(('stop',))
+                    self.conn.recv()
+                    return None
+            _, move, self.search_stats = self.conn.recv()
+            return move
+        except (EOFError, OSError):
+            # The worker is gone: no move rather than a hung turn
+            return None
+
+    def ponder(self, position, cancel):
+        """Same contract as the AI's ponder: the worker searches until cancel is set"""
+        try:
+            self.conn.send(('ponder', position))
+            while not self.conn.poll(POLL_INTERVAL):
+                if cancel.is_set():
+                    self.conn.send(('stop',))
+                    break
+            return self.conn.recv()[1]
+        except (EOFError, OSError):
+            return None
+
+    def new_game(self):
+        try:
+            self.conn.send(('new_game',))
+        except (EOFError, OSError):
+            # A dead worker has no table to clear; restarting the game must not fail
+            pass
+
+    def close(self):
+        """Stop the worker, killing it if it does not quit on its own"""
+        try:
+            self.conn.send(('quit',))
+        except (EOFError, OSError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
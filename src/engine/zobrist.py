@@ -0,0 +1,47 @@
+"""
+Zobrist keys: one random 64-bit number per piece on each square, plus the
+side to move, the castling rights and the en-passant file. A position's hash
+is the XOR of the keys of everything on it.
+"""
+import random
+
+from .position import EMPTY, PAWN, BLACK
+
+_random = random.Random(0x5EED)
+
+
+def _key():
+    return _random.getrandbits(64)
+
+
+# PIECE_KEYS[piece][sq], indexed by piece code like Position.bitboards
+PIECE_KEYS = [[_key() for _ in range(64)] for _ in range(15)]
+SIDE_KEY = _key()
+CASTLING_KEYS = [_key() for _ in range(16)]
+EP_KEYS = [_key() for _ in range(8)]
+
+
+def compute_hash(position):
+    """Hash of a position built from scratch"""
+    key = 0
+    for sq, piece in enumerate(position.squares):
+        if piece != EMPTY:
+            key ^= PIECE_KEYS[piece][sq]
+    if position.side == BLACK:
+        key ^= SIDE_KEY
+    key ^= CASTLING_KEYS[position.castling]
+    if position.ep >= 0:
+        key ^= EP_KEYS[position.ep & 7]
+    return key
+
+
+def compute_pawn_hash(position):
+    """Hash of the pawns alone, for pawn structure caches"""
+    key = 0
+    for side in (0, 1):
+        pawns = position.bitboards[(side << 3) | PAWN]
+        while pawns:
+            low = pawns & -pawns
+            key ^= PIECE_KEYS[(side << 3) | PAWN][low.bit_length() - 1]
+            pawns ^= low
+    return key
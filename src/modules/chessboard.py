@@ -1,4 +1,6 @@
 from config.settings.settings import *
+from src.engine import Position, PIECE_TYPES, EMPTY, QUEEN, WHITE, make_piece
+from src.engine.position import PIECE_LETTERS, FLAG_EN_PASSANT, FLAG_CASTLE, CASTLING_ROOK
 import pygame
 
 chessboard[0] = scale2x(chessboard[0])
@@ -10,14 +12,38 @@ class ChessBoard():
         self.chessboard = [chessboard[0], chessboard[1]]
         self.surface = pygame.Surface((self.size * 8, self.size * 8))
         self.map = [[None for _ in range(8)] for _ in range(8)]
+        # The position is the source of truth, the sprites in map mirror it for drawing
+        self.position = Position()
         self.drawSurface()
 
+    def setup(self, pieces, side=WHITE):
+        """Rebuild the map and the position from a list of sprites"""
+        self.map = [[None for _ in range(8)] for _ in range(8)]
+        self.position = Position()
+        for piece in pieces:
+            if not piece.is_captured:
+                self.place_piece(piece)
+        self.position.side = side
+        self.position.infer_castling_rights()
+
     def place_piece(self, piece):
         """Place piece on the chessboard"""
         x, y = piece.rect.topleft
         grid_x = x // TILESIZE
         grid_y = y // TILESIZE
         self.map[grid_y][grid_x] = piece
+        self.position.set_piece(grid_y * 8 + grid_x, self.piece_code(piece))
+
+    def remove_piece(self, piece):
+        """Take a sprite off the map and the position"""
+        grid_x, grid_y = piece.pos
+        if self.map[grid_y][grid_x] is piece:
+            self.map[grid_y][grid_x] = None
+            self.position.set_piece(grid_y * 8 + grid_x, EMPTY)
+
+    @staticmethod
+    def piece_code(piece):
+        return make_piece(piece.side, PIECE_TYPES[piece.__class__.__name__])
 
     def is_occupied(self, grid_x, grid_y):
         """Check if the position on the chessboard is occupied"""
@@ -35,6 +61,64 @@ class ChessBoard():
         else:
             piece.rect.topleft = (old_x, old_y)
 
+    def get_moves_from(self, grid_x, grid_y):
+        """Target squares of the legal moves available to the piece on (x,y)"""
+        frm = grid_y * 8 + grid_x
+        return [((move >> 6) & 7, (move >> 9) & 7)
+                for move in self.position.legal_moves() if move & 63 == frm]
+
+    def find_move(self, old_pos, new_pos, promo=QUEEN):
+        """Engine move for a from/to pair of grid coordinates, None if not available"""
+        return self.position.find_move(old_pos[1] * 8 + old_pos[0], new_pos[1] * 8 + new_pos[0], promo)
+
+    def apply_move(self, move, pieces, choose_promotion=False):
+        """Play an engine move on the position and mirror it on the sprites.
+        With choose_promotion the pawn is left on the board with its promotion menu open."""
+        frm, to = move & 63, (move >> 6) & 63
+        promo, flag = (move >> 12) & 7, move >> 15
+        piece = self.map[frm >> 3][frm & 7]
+        victim_sq = to
+        if flag == FLAG_EN_PASSANT:
+            victim_sq = to + 8 if piece.side == 0 else to - 8
+        victim = self.map[victim_sq >> 3][victim_sq & 7]
+        if victim is not None and victim is not piece:
+            victim.is_captured = True
+            if victim in pieces:
+                pieces.remove(victim)
+            self.map[victim_sq >> 3][victim_sq & 7] = None
+        if flag == FLAG_CASTLE:
+            rook_from, rook_to = CASTLING_ROOK[to]
+            self._move_sprite(self.map[rook_from >> 3][rook_from & 7], rook_from, rook_to)
+        self._move_sprite(piece, frm, to)
+        self.position.make_move(move)
+        if promo:
+            if choose_promotion:
+                piece.is_promoting = True
+            else:
+                new_piece = piece.promotion_options[PIECE_LETTERS[promo].upper()](
+                    piece.side, (piece.rect.x, piece.rect.y), self)
+                pieces[pieces.index(piece)] = new_piece
+                self.map[to >> 3][to & 7] = new_piece
+        return piece
+
+    def promote(self, new_piece):
+        """Replace the promoted pawn in the position with the chosen piece"""
+        self.place_piece(new_piece)
+
+    def _move_sprite(self, piece, frm, to):
+        if piece is None:
+            return
+        if self.map[frm >> 3][frm & 7] is piece:
+            self.map[frm >> 3][frm & 7] = None
+        x, y = to & 7, to >> 3
+        self.map[y][x] = piece
+        piece.rect.x = x * TILESIZE
+        piece.rect.y = y * TILESIZE
+        piece.pos = (x, y)
+        piece.last_position = (piece.rect.x, piece.rect.y)
+        if hasattr(piece, 'first_move'):
+            piece.first_move = False
+
     def drawSurface(self):
         for row in range(8):
             for col in range(8):
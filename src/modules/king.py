@@ -1,10 +1,6 @@
 from config.settings.settings import *
 from ..modules import Piece
 from .rook import Rook
-from .pawn import Pawn
-from .knight import Knight
-from .bishop import Bishop
-from .queen import Queen
 import pygame
 import math
 
@@ -74,39 +70,6 @@ class King(Piece):
         self.first_move = False
         self.is_in_check()
     
-    def _can_piece_attack(self, piece, target_x, target_y):
-        """Check if a piece can attack the position (x,y)"""
-        piece_x = piece.rect.x // TILESIZE
-        piece_y = piece.rect.y // TILESIZE
-        if isinstance(piece, Pawn):
-            direction = 1 if piece.side == 1 else -1
-            return (abs(piece_x - target_x) == 1 and 
-                    (piece_y + direction) == target_y)                
-        elif isinstance(piece, Knight):
-            dx = abs(piece_x - target_x)
-            dy = abs(piece_y - target_y)
-            return (dx == 2 and dy == 1) or (dx == 1 and dy == 2)        
-        elif isinstance(piece, (Rook, Queen)):
-            if piece_x == target_x or piece_y == target_y:
-                return self._is_path_clear(piece_x, piece_y, target_x, target_y)            
-        if isinstance(piece, (Bishop, Queen)):
-            if abs(piece_x - target_x) == abs(piece_y - target_y):
-                return self._is_path_clear(piece_x, piece_y, target_x, target_y)            
-        return False
-    
-    def _is_path_clear(self, start_x, start_y, end_x, end_y):
-        """Check if the path is blocked"""
-        dx = 0 if start_x == end_x else (end_x - start_x) // abs(end_x - start_x)
-        dy = 0 if start_y == end_y else (end_y - start_y) // abs(end_y - start_y)        
-        current_x = start_x + dx
-        current_y = start_y + dy        
-        while (current_x, current_y) != (end_x, end_y):
-            if self.board.map[current_y][current_x] is not None:
-                return False
-            current_x += dx
-            current_y += dy        
-        return True
-    
     def can_castle_kingside(self):
         """Check if the king can castle kingside"""
         if not self.first_move:
@@ -150,28 +113,14 @@ class King(Piece):
     
     def is_square_attacked(self, x, y):
         """Check if the position (x,y) is attacked"""
-        original_x = self.rect.x
-        original_y = self.rect.y
-        self.rect.x = x * TILESIZE
-        self.rect.y = y * TILESIZE
-        is_attacked = self.is_in_check()
-        self.rect.x = original_x
-        self.rect.y = original_y        
-        return is_attacked
+        return self.board.position.is_square_attacked(y * 8 + x, self.side ^ 1)
     
     def is_in_check(self):
-        """Check if the king is in check"""
-        x = self.rect.x // TILESIZE
-        y = self.rect.y // TILESIZE
-        for row in range(8):
-            for col in range(8):
-                piece = self.board.map[row][col]
-                if piece and piece.side != self.side:
-                    if self._can_piece_attack(piece, x, y):
-                        self.in_check = True
-                        return True
-        self.in_check = False
-        return False
+        """Check if the king is in check, read from the board's attack maps"""
+        x, y = self.pos
+        self.in_check = (not self.is_captured and
+                         self.board.position.is_square_attacked(y * 8 + x, self.side ^ 1))
+        return self.in_check
     
     def draw(self, screen):
         """Draw the king and the warning effect when in check"""
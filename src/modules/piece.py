@@ -16,7 +16,7 @@ class Piece(ABC, pygame.sprite.Sprite):
         self.board = board
         self.offset = pygame.math.Vector2(0, 0)
         self.is_captured = False
-        self.pos = (position[0] // TILESIZE, position[1] // TILESIZE)
+        self.pos = (int(position[0]) // TILESIZE, int(position[1]) // TILESIZE)
 
     @abstractmethod
     def get_possible_moves(self, chessboard=None):
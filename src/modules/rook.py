@@ -50,7 +50,7 @@ class Rook(Piece):
                 break        
         return moves
         
-    def move(self, new_position, board):
+    def move(self, x, y):
         """Override the move method to update first_move"""
-        super().move(new_position, board)
+        super().move(x, y)
         self.first_move = False
\ No newline at end of file
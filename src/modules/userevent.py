@@ -1,6 +1,5 @@
 from config.settings.settings import *
 import pygame
-from .pawn import Pawn
 
 class UserEvent:
     def __init__(self):
@@ -23,13 +22,13 @@ class UserEvent:
             if event.button == 1:
                 return self._handle_left_click(event, objects, chessboard)
             elif event.button == 3:
-                return self._handle_right_click(event, objects, deletedsprites)
+                return self._handle_right_click(event, objects, deletedsprites, chessboard)
         elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
             return self._handle_piece_movement(objects, chessboard)
         elif event.type == pygame.MOUSEMOTION:
             self._handle_drag_motion(event, objects)
         elif event.type == pygame.KEYDOWN and event.key == pygame.K_r:
-            self._handle_piece_restore(objects, deletedsprites)
+            self._handle_piece_restore(objects, deletedsprites, chessboard)
         return False
 
     def _handle_left_click(self, event, objects, chessboard):
@@ -37,14 +36,15 @@ class UserEvent:
         for obj in objects:
             if obj.checkCollision(event.pos) and obj.side == 0:
                 obj.selected = True
-                self.possible_moves = obj.get_possible_moves(chessboard)
+                self.possible_moves = chessboard.get_moves_from(*obj.get_position())
         return False
 
-    def _handle_right_click(self, event, objects, deletedsprites):
+    def _handle_right_click(self, event, objects, deletedsprites, chessboard):
         """Handle right mouse button click"""
         for obj in objects:
             if obj.rect.collidepoint(event.pos):
                 objects.remove(obj)
+                chessboard.remove_piece(obj)
                 deletedsprites.append(obj)
                 break
         return False
@@ -69,22 +69,11 @@ class UserEvent:
 
     def _execute_move(self, piece, current_pos, old_pos, objects, chessboard):
         """Execute a valid piece movement"""
-        grid_x, grid_y = current_pos
-        old_grid_x, old_grid_y = old_pos
-
-        target_piece = chessboard.map[grid_y][grid_x]
-        if target_piece is not None and target_piece.side != piece.side:
-            objects.remove(target_piece)
-            target_piece.is_captured = True
-
-        chessboard.map[old_grid_y][old_grid_x] = None
-        chessboard.map[grid_y][grid_x] = piece
-
-        if isinstance(piece, Pawn):
-            piece.move(grid_x, grid_y)
-        else:
-            piece.last_position = (piece.rect.x, piece.rect.y)
-            piece.pos = (grid_x, grid_y)
+        move = chessboard.find_move(old_pos, current_pos)
+        if move is None:
+            self._reset_move(piece, old_pos, chessboard)
+            return False
+        chessboard.apply_move(move, objects, choose_promotion=True)
         return True
 
     def _reset_move(self, piece, old_pos, chessboard):
@@ -99,10 +88,14 @@ class UserEvent:
             if obj.selected:
                 obj.update(event.pos)
 
-    def _handle_piece_restore(self, objects, deletedsprites):
+    def _handle_piece_restore(self, objects, deletedsprites, chessboard):
         """Handle piece restoration with 'R' key"""
         if deletedsprites:
-            objects.append(deletedsprites.pop())
+            piece = deletedsprites[-1]
+            x, y = piece.pos
+            if chessboard.map[y][x] is None:
+                chessboard.place_piece(deletedsprites.pop())
+                objects.append(piece)
 
     def draw(self, screen):
         self.mypos = pygame.mouse.get_pos()
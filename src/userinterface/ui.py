@@ -54,8 +54,11 @@ class UI:
         current_turn = "White" if game_state.current_turn == 0 else "Black"
         self.turn_text.update(f"Current Turn: {current_turn}")
         if game_state.game_over:
-            winner = "White" if game_state.winner == 0 else "Black"
-            self.game_over_text.update(f"{winner} Wins!")
+            if game_state.winner is None:
+                self.game_over_text.update("Draw!")
+            else:
+                winner = "White" if game_state.winner == 0 else "Black"
+                self.game_over_text.update(f"{winner} Wins!")
             self.restart_button.set_enabled(True)
         else:
             self.game_over_text.update("")